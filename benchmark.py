@@ -0,0 +1,249 @@
+"""
+로컬 Notion 대역 서버(mock_notion_server)를 상대로 각 작업을 실행해서
+엔드포인트별 요청 수, wall time(p50/p95), peak RSS 를 측정합니다.
+
+    python benchmark.py --rows 100,1000,100000 --depths 1,4 --latency 0,0.05 --output bench_results.json
+    python benchmark.py --baseline bench_results.json   # 이전 결과와 비교 (회귀 시 exit 1)
+"""
+import argparse
+import contextlib
+import copy
+import datetime
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_PATH = os.path.join(SCRIPT_DIR, "fixtures", "notion_workspace.json")
+PAGE_ID = "2f30d907-031e-80cf-99dd-e75385b67a72"
+HEALTH_LOG_TITLE = "Health Log"
+
+JOBS = ["calendar", "age", "love_letter", "settings"]
+EMOJIS = ["🏥", "💊", "🛁", "✂️", "🚶", "⚖️", "🦷", "🎂"]
+TITLES = ["정기 검진", "심장사상충 약", "목욕", "미용", "산책", "몸무게", "스케일링", "생일"]
+
+RESULT_PREFIX = "BENCH_RESULT "
+
+# 회귀로 판단할 p50 증가 비율
+REGRESSION_TOLERANCE = 0.2
+
+def load_base_fixture():
+    with open(FIXTURE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def filler_blocks(prefix, count):
+    return [{"type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": f"{prefix} {i}"}}]}}
+            for i in range(count)]
+
+def make_fixture(depth=1, health_rows=100, with_settings=True, seed=0):
+    """
+    기본 fixture 를 바탕으로 페이지 트리 깊이와 Health Log 크기를 바꾼 fixture 를 만듭니다.
+    depth 만큼 토글을 중첩해서 나이/계절 블록을 더 깊은 곳에 둡니다.
+    """
+    fixture = load_base_fixture()
+    page = fixture["pages"][0]
+    children = page["children"]
+    if not with_settings:
+        children[:] = [b for b in children if b["type"] != "toggle"]
+
+    profile = children[0]
+    for level in range(depth):
+        profile = {
+            "type": "toggle",
+            "toggle": {"rich_text": [{"text": {"content": f"섹션 {level}"}}]},
+            "children": filler_blocks(f"메모 {level}", 5) + [
+                {"type": "toggle", "toggle": {"rich_text": [{"text": {"content": f"기록 {level}"}}]},
+                 "children": filler_blocks(f"기록 {level}", 3)},
+                profile,
+            ],
+        }
+    children[0] = profile
+
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    rows = []
+    for i in range(health_rows):
+        day = today - datetime.timedelta(days=rng.randrange(0, 365 * 3))
+        kind = rng.randrange(len(EMOJIS))
+        rows.append({
+            "icon": {"type": "emoji", "emoji": EMOJIS[kind]},
+            "created_time": f"{day.isoformat()}T09:00:00.000Z",
+            "properties": {
+                "이름": {"title": [{"text": {"content": f"{TITLES[kind]} #{i}"}}]},
+                "날짜": {"date": {"start": day.isoformat()}},
+            },
+        })
+    for db in fixture["databases"]:
+        if db["title"] == HEALTH_LOG_TITLE:
+            db["rows"] = rows
+    return fixture
+
+def peak_rss_kb():
+    # ru_maxrss 는 Linux 에서 fork 한 부모의 값을 이어받으므로 /proc 의 VmHWM 을 먼저 봅니다.
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if resource:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return None
+
+def run_job(job):
+    """
+    (자식 프로세스) 작업 하나를 실행하고 wall time 과 peak RSS 를 출력합니다.
+    """
+    sys.path.insert(0, SCRIPT_DIR)
+    token = os.environ["NOTION_TOKEN"]
+    page_id = os.environ["NOTION_PAGE_ID"]
+    start = time.perf_counter()
+    # build_calendar 는 import 시 stdout.reconfigure 를 호출하므로 실제 파일 객체를 씁니다.
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        if job == "calendar":
+            import build_calendar
+            build_calendar.main()
+        elif job == "age":
+            import update_age
+            update_age.main()
+        elif job == "love_letter":
+            import update_love_letter
+            update_love_letter.main()
+        elif job == "settings":
+            import update_age
+            update_age.ensure_settings_block(token, page_id)
+    wall = time.perf_counter() - start
+    print(RESULT_PREFIX + json.dumps({"wall": wall, "peak_rss_kb": peak_rss_kb()}))
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+def run_scenario(job, depth, rows, latency, repeat, rate_limit):
+    import mock_notion_server
+
+    fixture = make_fixture(depth, rows, with_settings=(job != "settings"))
+    walls = []
+    rss = []
+    requests_by_endpoint = {}
+    for _ in range(repeat):
+        # 매 반복마다 깨끗한 워크스페이스로 시작 (쓰기 작업이 상태를 바꾸므로)
+        server = mock_notion_server.start_server(copy.deepcopy(fixture), latency=latency)
+        env = dict(os.environ,
+                   NOTION_API_BASE=server.base_url,
+                   NOTION_TOKEN="benchmark",
+                   NOTION_PAGE_ID=PAGE_ID.replace("-", ""))
+        if rate_limit:
+            env["NOTION_RATE_LIMIT"] = str(rate_limit)
+        try:
+            with tempfile.TemporaryDirectory() as workdir:
+                # 실행마다 빈 로컬 캐시로 시작 (저장소의 .notion_cache 를 건드리지 않도록)
+                env["NOTION_CACHE_DIR"] = os.path.join(workdir, ".notion_cache")
+                out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", job],
+                                     cwd=workdir, env=env, capture_output=True, text=True,
+                                     encoding="utf-8")
+            if out.returncode != 0:
+                raise RuntimeError(f"{job} failed:\n{out.stderr}")
+            line = next(l for l in out.stdout.splitlines() if l.startswith(RESULT_PREFIX))
+            result = json.loads(line[len(RESULT_PREFIX):])
+            walls.append(result["wall"])
+            if result["peak_rss_kb"] is not None:
+                rss.append(result["peak_rss_kb"])
+            with server.stats_lock:
+                requests_by_endpoint = {" ".join(k): v for k, v in sorted(server.stats.items())}
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    return {
+        "job": job,
+        "depth": depth,
+        "rows": rows,
+        "latency": latency,
+        "repeat": repeat,
+        "requests": requests_by_endpoint,
+        "total_requests": sum(requests_by_endpoint.values()),
+        "wall_p50": percentile(walls, 50),
+        "wall_p95": percentile(walls, 95),
+        "peak_rss_kb": max(rss) if rss else None,
+    }
+
+def scenario_key(result):
+    return f"{result['job']}|depth={result['depth']}|rows={result['rows']}|latency={result['latency']}"
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {scenario_key(r): r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        old = baseline.get(scenario_key(result))
+        if not old:
+            continue
+        if result["total_requests"] > old["total_requests"]:
+            regressions.append(f"{scenario_key(result)}: requests {old['total_requests']} -> {result['total_requests']}")
+        if result["wall_p50"] > old["wall_p50"] * (1 + REGRESSION_TOLERANCE):
+            regressions.append(f"{scenario_key(result)}: p50 {old['wall_p50']:.3f}s -> {result['wall_p50']:.3f}s")
+    return regressions
+
+def parse_list(value, cast):
+    return [cast(v) for v in value.split(",") if v.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark against the local Notion stand-in")
+    parser.add_argument("--jobs", default=",".join(JOBS))
+    parser.add_argument("--depths", default="1,4", help="page tree depth (age / love_letter / settings)")
+    parser.add_argument("--rows", default="100,1000", help="Health Log size (calendar)")
+    parser.add_argument("--latency", default="0,0.05", help="injected seconds per request")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="override NOTION_RATE_LIMIT for the jobs (default: production limiter)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=None, help="previous results to check for regressions")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_job(args.child)
+        return
+
+    sys.path.insert(0, SCRIPT_DIR)
+    results = []
+    for job in parse_list(args.jobs, str):
+        for latency in parse_list(args.latency, float):
+            # calendar 는 DB 크기, 나머지는 페이지 깊이에 따라 달라집니다.
+            if job == "calendar":
+                grid = [(1, rows) for rows in parse_list(args.rows, int)]
+            else:
+                grid = [(depth, 0) for depth in parse_list(args.depths, int)]
+            for depth, rows in grid:
+                result = run_scenario(job, depth, rows, latency, args.repeat, args.rate_limit)
+                results.append(result)
+                rss = f"{result['peak_rss_kb'] / 1024:.1f}MB" if result["peak_rss_kb"] else "n/a"
+                print(f"{scenario_key(result)}: {result['total_requests']} requests, "
+                      f"p50 {result['wall_p50']:.3f}s, p95 {result['wall_p95']:.3f}s, peak RSS {rss}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"created": datetime.datetime.now().isoformat(timespec="seconds"),
+                   "python": sys.version.split()[0], "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+원하는 블록 트리를 선언해 두고, 현재 children 과 비교해서 필요한 호출만 보냅니다.
+
+    section = [{"type": "toggle", "toggle": {"rich_text": [...]}, "keep": True, "children": [...]}]
+    block_reconciler.reconcile(token, page_id, section, key=settings_key)
+
+- key 가 같은 현재 블록이 있으면 내용이 다를 때만 PATCH 합니다. "keep": True 인 노드는 내용을 건드리지 않습니다.
+- 없는 블록은 바로 앞 형제 뒤에(after) append 하고, 연속된 블록은 한 요청에 모아 보냅니다.
+  한 요청은 children 100개, 중첩 2단계까지이고 넘치는 부분은 만든 블록 아래에 이어서 append 합니다.
+- prune=True 면 원하는 트리에 없는 블록을 지웁니다.
+
+key(block, previous) 는 요청 형식(text.content)과 응답 형식(plain_text) 블록 모두에 같은 값을 내야 하고,
+previous 는 바로 앞 형제의 key 입니다 ("제목 바로 다음 callout" 같은 위치 조건에 씁니다).
+"""
+import block_walker
+import block_writer
+import notion_client
+import notion_metrics
+
+MAX_CHILDREN = 100  # 한 요청의 children 배열 최대 길이
+MAX_NESTING = 2     # 한 요청 안에서 children 을 중첩할 수 있는 단계
+
+def default_key(block, previous=None):
+    return block.get("type"), block_writer.block_plain_text(block)
+
+def _contains(have, want):
+    if isinstance(want, dict):
+        return isinstance(have, dict) and all(_contains(have.get(k), v) for k, v in want.items())
+    return have == want
+
+def _differs(node, block):
+    b_type = node["type"]
+    want = node.get(b_type, {})
+    have = block.get(b_type, {})
+    for field, value in want.items():
+        if field == "rich_text":
+            if not block_writer.same_rich_text(value, have.get("rich_text")):
+                return True
+        elif not _contains(have.get(field), value):
+            return True
+    return False
+
+def _payload(node, depth, path, deferred):
+    """
+    요청용 블록을 만듭니다. 중첩 한도나 100개를 넘는 children 은 (path, 남은 노드) 로 deferred 에 넣습니다.
+    """
+    b_type = node["type"]
+    body = dict(node.get(b_type, {}))
+    children = node.get("children") or []
+    if children:
+        if depth > MAX_NESTING:
+            deferred.append((path, children))
+        else:
+            body["children"] = [_payload(child, depth + 1, path + (i,), deferred)
+                                for i, child in enumerate(children[:MAX_CHILDREN])]
+            if len(children) > MAX_CHILDREN:
+                deferred.append((path, children[MAX_CHILDREN:]))
+    return {"object": "block", "type": b_type, b_type: body}
+
+def _count(nodes):
+    return sum(1 + _count(node.get("children") or []) for node in nodes)
+
+def _append(token, parent_id, nodes, after, stats):
+    created = []
+    for start in range(0, len(nodes), MAX_CHILDREN):
+        chunk = nodes[start:start + MAX_CHILDREN]
+        deferred = []
+        payload = {"children": [_payload(node, 1, (i,), deferred) for i, node in enumerate(chunk)]}
+        if after:
+            payload["after"] = after
+        res = notion_client.patch(token, f"/blocks/{parent_id}/children", payload)
+        notion_client.raise_for_error(res)
+        results = res.json().get("results", [])
+        stats["calls"] += 1
+        stats["appended"] += _count(chunk) - sum(_count(rest) for _, rest in deferred)
+        created += results
+        if results:
+            after = results[-1]["id"]
+
+        for path, rest in deferred:
+            # 만든 블록의 ID 는 최상위만 응답에 오므로 더 깊은 블록은 children 을 읽어서 찾음
+            block = results[path[0]]
+            for index in path[1:]:
+                block = block_walker.fetch_all_children(token, block["id"])[index]
+            _append(token, block["id"], rest, None, stats)
+    return created
+
+def _reconcile(token, parent_id, desired, key, prune, current, stats):
+    if current is None:
+        current = block_walker.fetch_all_children(token, parent_id)
+
+    available = {}
+    previous = None
+    for block in current:
+        previous = key(block, previous)
+        available.setdefault(previous, []).append(block)
+
+    ids = {}
+    groups = []  # [after, [(key, node)]] — 같은 자리에 붙일 노드를 모아서 한 번에 append
+    anchor = None
+    previous = None
+    matched = set()
+    for node in desired:
+        previous = node_key = key(node, previous)
+        candidates = available.get(node_key)
+        if not candidates:
+            if groups and groups[-1][0] == anchor:
+                groups[-1][1].append((node_key, node))
+            else:
+                groups.append([anchor, [(node_key, node)]])
+            continue
+
+        block = candidates.pop(0)
+        matched.add(block["id"])
+        ids[node_key] = anchor = block["id"]
+        if not node.get("keep") and _differs(node, block):
+            b_type = node["type"]
+            res = notion_client.patch(token, f"/blocks/{block['id']}", {b_type: node.get(b_type, {})})
+            notion_client.raise_for_error(res)
+            stats["calls"] += 1
+            stats["updated"] += 1
+        if node.get("children") is not None:
+            children = block_walker.fetch_all_children(token, block["id"]) if block.get("has_children") else []
+            _reconcile(token, block["id"], node["children"], key, prune, children, stats)
+
+    # 맨 앞에 넣는 API 는 없어서 앞 형제가 없는 노드는 끝에 붙입니다.
+    for after, items in groups:
+        created = _append(token, parent_id, [node for _, node in items], after, stats)
+        for (node_key, _), block in zip(items, created):
+            ids[node_key] = block["id"]
+
+    if prune:
+        for block in current:
+            if block["id"] not in matched and not block.get("archived"):
+                res = notion_client.delete(token, f"/blocks/{block['id']}")
+                notion_client.raise_for_error(res)
+                stats["calls"] += 1
+                stats["deleted"] += 1
+    return ids
+
+class Reconciled(dict):
+    """
+    desired 최상위 노드의 key -> 블록 ID. writes 는 보낸 쓰기 요청 수입니다 (0 이면 바꾼 것이 없음).
+    """
+    writes = 0
+
+def reconcile(token, parent_id, desired, key=default_key, prune=False, current=None):
+    """
+    parent_id 의 children 을 desired 에 맞춥니다. current 에 이미 읽은 children 을 주면 다시 읽지 않습니다.
+    반환값: Reconciled (있던 블록 또는 새로 만든 블록의 ID, 쓰기 요청 수)
+    """
+    stats = {"appended": 0, "updated": 0, "deleted": 0, "calls": 0}
+    ids = Reconciled(_reconcile(token, parent_id, desired, key, prune, current, stats))
+    ids.writes = stats["calls"]
+    for name in ("appended", "updated", "deleted"):
+        if stats[name]:
+            notion_metrics.increment(f"blocks_{name}", stats[name])
+    if stats["calls"]:
+        print(f"Reconciled blocks: {stats['appended']} appended, {stats['updated']} updated, "
+              f"{stats['deleted']} deleted in {stats['calls']} calls.")
+    return ids
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import notion_client
+
+# 동시에 진행할 children 요청 수. 실제 처리량은 rate_limiter 가 제한합니다.
+DEFAULT_CONCURRENCY = 4
+
+def fetch_all_children(token, block_id, fresh=False):
+    """
+    has_more / next_cursor 를 따라가며 블록의 모든 자식을 가져옵니다.
+    fresh=True 면 공유 스냅샷/페이지 사본을 거치지 않고 Notion 에서 읽습니다.
+    """
+    results = []
+    params = {"page_size": 100}
+    while True:
+        res = notion_client.get(token, f"/blocks/{block_id}/children", params=params, fresh=fresh)
+        notion_client.raise_for_error(res)
+        data = res.json()
+        results.extend(data.get("results", []))
+        if not data.get("has_more") or not data.get("next_cursor"):
+            return results
+        params = {"page_size": 100, "start_cursor": data["next_cursor"]}
+
+async def walk_blocks_async(token, root_ids, visit, should_descend=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    블록 트리를 BFS 로 탐색하되, 한 레벨의 children 요청은 병렬로 보냅니다.
+    visit(block, depth) 가 True 를 반환하면 남은 요청을 취소하고 바로 끝냅니다.
+    should_descend(block) 가 False 인 블록은 자식을 가져오지 않습니다.
+    중간에 멈췄으면 True 를 반환합니다.
+    요청 하나가 실패하거나 멈추면 아직 시작하지 않은 요청은 보내지 않습니다.
+    이미 스레드에서 실행 중인 요청은 중단되지 않고 끝까지 갑니다 (결과는 버림).
+    """
+    if isinstance(root_ids, str):
+        root_ids = [root_ids]
+    semaphore = asyncio.Semaphore(concurrency)
+    stop = threading.Event()
+
+    def fetch_children(block_id):
+        if stop.is_set():
+            return []
+        try:
+            return fetch_all_children(token, block_id)
+        except BaseException:
+            stop.set()
+            raise
+
+    async def fetch(block_id):
+        async with semaphore:
+            if stop.is_set():
+                return []
+            return await asyncio.to_thread(fetch_children, block_id)
+
+    level = list(dict.fromkeys(root_ids))
+    visited = set(level)
+    depth = 0
+    while level:
+        tasks = [asyncio.ensure_future(fetch(block_id)) for block_id in level]
+        next_level = []
+        try:
+            # 결과는 요청 순서대로 처리해서 순차 BFS 와 같은 순서로 방문합니다.
+            for task in tasks:
+                for block in await task:
+                    if visit(block, depth):
+                        stop.set()
+                        return True
+                    b_id = block.get("id")
+                    if not block.get("has_children") or b_id in visited:
+                        continue
+                    if should_descend is None or should_descend(block):
+                        visited.add(b_id)
+                        next_level.append(b_id)
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        level = next_level
+        depth += 1
+    return False
+
+def walk_blocks(token, root_ids, visit, should_descend=None, concurrency=DEFAULT_CONCURRENCY):
+    return asyncio.run(walk_blocks_async(token, root_ids, visit, should_descend, concurrency))
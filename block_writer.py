@@ -0,0 +1,74 @@
+import hashlib
+import json
+import notion_client
+import notion_metrics
+
+DEFAULT_ANNOTATIONS = {
+    "bold": False, "italic": False, "strikethrough": False,
+    "underline": False, "code": False, "color": "default"
+}
+
+def normalize_rich_text(rich_text):
+    """
+    요청 형식(text.content)과 응답 형식(plain_text, 기본 annotations 포함)을 같은 모양으로 바꿔서
+    내용이 같은지 비교할 수 있게 합니다.
+    """
+    normalized = []
+    for item in rich_text or []:
+        annotations = {k: v for k, v in (item.get("annotations") or {}).items() if DEFAULT_ANNOTATIONS.get(k) != v}
+        if item.get("type") == "equation" or "equation" in item:
+            normalized.append(["equation", item.get("equation", {}).get("expression", ""), annotations])
+        else:
+            text = item.get("text") or {}
+            content = text.get("content", item.get("plain_text", ""))
+            link = (text.get("link") or {}).get("url")
+            # 같은 서식의 연속된 text 조각은 Notion 이 합칠 수 있으므로 합쳐서 비교
+            if normalized and normalized[-1][0] == "text" and normalized[-1][2] == annotations \
+                    and normalized[-1][3] == link:
+                normalized[-1][1] += content
+            else:
+                normalized.append(["text", content, annotations, link])
+    return normalized
+
+def same_rich_text(a, b):
+    return normalize_rich_text(a) == normalize_rich_text(b)
+
+def plain_text(rich_text):
+    """
+    rich_text 의 글자만 이어 붙입니다 (수식은 expression). 요청 형식과 응답 형식에서 같은 값이 나옵니다.
+    """
+    return "".join(item[1] for item in normalize_rich_text(rich_text))
+
+def block_plain_text(block):
+    b_type = block.get("type")
+    return plain_text((block.get(b_type) or {}).get("rich_text", []))
+
+def content_key(block_type, rich_text):
+    """
+    블록 타입 + rich_text 의 짧은 해시. 마지막으로 쓴 내용을 레지스트리에 저장해 둘 때 씁니다.
+    """
+    data = json.dumps([block_type, normalize_rich_text(rich_text)], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+def has_content(block, block_type, rich_text):
+    if not block or block.get("type") != block_type:
+        return False
+    return same_rich_text(block.get(block_type, {}).get("rich_text", []), rich_text)
+
+def write_rich_text(token, block_id, block_type, rich_text, current=None, last_key=None):
+    """
+    블록의 rich_text 를 바꿉니다. 이미 같은 내용이면 PATCH 하지 않습니다.
+    current 는 스캔/검증 때 받아 둔 블록, last_key 는 지난번에 쓴 content_key 입니다 (둘 다 선택).
+    반환값: "skipped", "updated" 또는 실패 시 None
+    """
+    if has_content(current, block_type, rich_text) or \
+            (current is None and last_key and last_key == content_key(block_type, rich_text)):
+        notion_metrics.increment("writes_skipped")
+        return "skipped"
+
+    response = notion_client.patch(token, f"/blocks/{block_id}", {block_type: {"rich_text": rich_text}})
+    if response.status_code != 200:
+        print(f"Update failed for {block_id}: {response.text}")
+        return None
+    notion_metrics.increment("writes")
+    return "updated"
@@ -1,493 +1,522 @@
 import os
-import requests
 import json
 import datetime
+import functools
+import gzip
+import hashlib
+import html
+import re
 import sys
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+import notion_client
+import notion_metrics
+import health_log_store
+import html_minify
+import local_cache
+import property_extractors
+import workspace_catalog
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli for .br output
+    brotli = None
 
 # Force UTF-8 encoding for stdout/stderr to handle emojis on all platforms
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 
-def fetch_health_log(token, db_id):
-    url = f"https://api.notion.com/v1/databases/{db_id}/query"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    # Filter for this month? Or just fetch everything and filter in python?
-    # Fetching simplified for now.
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "calendar.html")
+PLACEHOLDER = re.compile(r"\{%(\w+)%\}")
+
+@functools.lru_cache(maxsize=None)
+def load_template(minify=True):
+    """
+    Reads the page template once, minifies it (CALENDAR_MINIFY=0 keeps it readable)
+    and splits it into literal text at even indexes and placeholder names at odd ones.
+    """
+    with open(TEMPLATE_PATH, "r", encoding="utf-8") as f:
+        text = f.read()
+    if minify:
+        text = html_minify.minify_html(text)
+    return tuple(PLACEHOLDER.split(text))
+
+def render_template(values):
+    parts = list(load_template(os.environ.get("CALENDAR_MINIFY") != "0"))
+    parts[1::2] = [values[name] for name in parts[1::2]]
+    return "".join(parts)
+
+# Calendar window: current month +/- N months (CALENDAR_WINDOW_MONTHS=all backfills everything)
+DEFAULT_WINDOW_MONTHS = 12
+
+def window_months():
+    value = os.environ.get("CALENDAR_WINDOW_MONTHS", str(DEFAULT_WINDOW_MONTHS)).strip().lower()
+    if value in ("", "all"):
+        return None
+    return int(value)
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+DEFAULT_SOURCES = [{"title": "Health Log"}]
+
+def load_sources():
+    """
+    Databases merged into the calendar. CALENDAR_SOURCES is a JSON list, or a path to a
+    JSON file holding one, e.g.
+        [{"title": "Health Log", "tag": "health"},
+         {"title": "Walks", "tag": "walk", "emoji": "🚶", "date_property": "Day"}]
+    Keys: "title" (or "id"), "tag" (defaults to the title), "date_property",
+    "title_property", "emoji_property" and "emoji" (used when a page has no icon).
+    An empty list (or file) falls back to DEFAULT_SOURCES.
+    """
+    value = os.environ.get("CALENDAR_SOURCES", "").strip()
+    if not value:
+        sources = DEFAULT_SOURCES
+    elif value.startswith("["):
+        sources = json.loads(value)
+    else:
+        with open(value, "r", encoding="utf-8") as f:
+            text = f.read()
+        sources = json.loads(text) if text.strip() else []
+    if not sources:
+        print("CALENDAR_SOURCES lists no databases. Using the default Health Log source.")
+        sources = DEFAULT_SOURCES
+
+    normalized = []
+    for source in sources:
+        source = dict(source)
+        if not source.get("title") and not source.get("id"):
+            raise ValueError(f"Calendar source needs a title or an id: {source}")
+        source.setdefault("tag", source.get("title") or source["id"])
+        normalized.append(source)
+    return normalized
+
+def compile_source_schema(schema, source=None):
+    # CALENDAR_DATE_PROPERTY / CALENDAR_TITLE_PROPERTY are the defaults for sources that don't pin them
+    source = source or {}
+    return property_extractors.compile_schema(
+        schema,
+        date_property=source.get("date_property") or os.environ.get("CALENDAR_DATE_PROPERTY"),
+        title_property=source.get("title_property") or os.environ.get("CALENDAR_TITLE_PROPERTY"),
+    )
+
+def source_query(token, db_id, months, source=None, today=None):
+    """
+    Works out the server-side date window and the properties parse_data actually reads
+    (the chosen date, title and emoji property) from the cached database schema.
+    """
+    schema = workspace_catalog.get_schema(token, db_id)
+    if not schema:
+        return {"window": None, "properties": None}
+    compiled = compile_source_schema(schema, source)
+    date_property = compiled.date_property
+    if schema.get(date_property) != "date":
+        # A created_time property holds the page created_time, which the window already covers
+        date_property = None
+
+    window = None
+    if months is not None:
+        first = (today or datetime.date.today()).replace(day=1)
+        window = {
+            "start": add_months(first, -months).isoformat(),
+            "end": add_months(first, months + 1).isoformat(),
+            "date_property": date_property,
+        }
+
+    property_ids = workspace_catalog.get_property_ids(token, db_id)
+    properties = None
+    if property_ids:
+        wanted = [compiled.date_property, compiled.title_property, (source or {}).get("emoji_property")]
+        properties = [property_ids[name] for name in wanted if name in property_ids]
+    return {"window": window, "properties": properties}
+
+def window_filter(window, query_filter=None):
+    """
+    Pages whose date property falls in [start, end), plus pages without a date whose
+    created_time does (parse_data falls back to it). Extra conditions are pushed into
+    each branch so the filter stays within Notion's two levels of nesting.
+    """
+    created = [
+        {"timestamp": "created_time", "created_time": {"on_or_after": window["start"]}},
+        {"timestamp": "created_time", "created_time": {"before": window["end"]}},
+    ]
+    date_prop = window["date_property"]
+    if date_prop:
+        branches = [
+            [{"property": date_prop, "date": {"on_or_after": window["start"]}},
+             {"property": date_prop, "date": {"before": window["end"]}}],
+            [{"property": date_prop, "date": {"is_empty": True}}] + created,
+        ]
+    else:
+        branches = [created]
+    if query_filter:
+        branches = [branch + [query_filter] for branch in branches]
+    if len(branches) == 1:
+        return {"and": branches[0]}
+    return {"or": [{"and": branch} for branch in branches]}
+
+def in_window(window, page):
+    """
+    Local version of window_filter for one page (dates compared by their YYYY-MM-DD part).
+    """
+    date_prop = window["date_property"]
+    value = None
+    if date_prop:
+        value = ((page.get("properties", {}).get(date_prop) or {}).get("date") or {}).get("start")
+    value = (value or page.get("created_time") or "")[:10]
+    return window["start"] <= value < window["end"]
+
+def fetch_health_log(token, db_id, query_filter=None, window=None, properties=None):
+    """
+    Yields pages as each cursor page (at most 100 pages) arrives, so callers never hold
+    the whole database in memory.
+    The window is only sent with a full query: an incremental query (query_filter) must also
+    return pages whose date was moved out of the window, so the store picks up the new date.
+    """
     payload = { "page_size": 100 }
+    if query_filter:
+        payload["filter"] = query_filter
+    elif window:
+        payload["filter"] = window_filter(window)
+    # Only ask for the properties parse_data reads (icon and timestamps always come back)
+    params = {"filter_properties": properties} if properties else None
     
-    results = []
     has_more = True
     start_cursor = None
     
     while has_more:
         if start_cursor: payload["start_cursor"] = start_cursor
         
-        res = requests.post(url, headers=headers, json=payload)
+        res = notion_client.post(token, f"/databases/{db_id}/query", payload, params=params)
         if res.status_code != 200:
+            # Don't publish a truncated calendar: fail the whole fetch
             print(f"Error fetching DB: {res.text}")
-            break
+            notion_client.raise_for_error(res)
             
         data = res.json()
-        results.extend(data.get("results", []))
         has_more = data.get("has_more")
         start_cursor = data.get("next_cursor")
-        
-    return results
-
-def find_health_log_id(token):
-    url = "https://api.notion.com/v1/search"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    payload = {
-        "query": "Health Log",
-        "filter": {
-            "value": "database",
-            "property": "object"
-        },
-        "page_size": 1
-    }
-    
+        yield from data.get("results", [])
+
+def find_source_id(token, source, refresh=False):
+    if source.get("id"):
+        return source["id"]
     try:
-        res = requests.post(url, headers=headers, json=payload)
-        if res.status_code == 200:
-            results = res.json().get("results", [])
-            if results:
-                found_id = results[0]["id"]
-                print(f"Observed 'Health Log' ID: {found_id}")
-                return found_id
+        found_id = workspace_catalog.find_database(token, source["title"], refresh=refresh)
+        if found_id:
+            print(f"Observed '{source['title']}' ID: {found_id}")
+            return found_id
     except Exception as e:
         print(f"Error searching for DB: {e}")
         
     return None
 
-def parse_data(raw_data):
-    # Map "YYYY-MM-DD" -> List of entries (dicts)
-    calendar_data = {}
+class SourceNotFound(Exception):
+    pass
+
+def sync_source(token, source, months, full_sync=False):
+    """
+    Brings one source database's local mirror up to date. Returns its database id.
+    """
+    db_id = find_source_id(token, source)
+    if not db_id:
+        raise SourceNotFound(source.get("title") or source["id"])
+
+    def sync(db_id):
+        query = source_query(token, db_id, months, source)
+        # A different window / projection makes the local copy stale, so the store reconciles
+        scope = json.dumps(query, sort_keys=True)
+        # Rows outside the window (e.g. from an all-history backfill) stay in the store
+        covers = functools.partial(in_window, query["window"]) if query["window"] else None
+        return health_log_store.sync(token, db_id, functools.partial(fetch_health_log, **query),
+                                     full=full_sync, scope=scope, covers=covers)
+
+    try:
+        fetched, reconciled = sync(db_id)
+    except notion_client.NotionAPIError as e:
+        if e.status == 400 and e.code == "validation_error":
+            # A property was renamed or deleted since the schema was cached: refresh it once
+            workspace_catalog.load_catalog(token, refresh=True)
+        elif e.status != 404 or source.get("id"):
+            raise
+        else:
+            # The cached catalog points at a deleted database: refresh it once
+            db_id = find_source_id(token, source, refresh=True)
+            if not db_id:
+                raise
+        fetched, reconciled = sync(db_id)
+    mode = "full reconcile" if reconciled else "incremental"
+    print(f"[{source['tag']}] Synced {fetched} changed entries ({mode}).")
+    return db_id
+
+def counted(pages, seen):
+    # Passes pages through while adding to seen["count"] and noting the first page's property keys
+    for page in pages:
+        if "keys" not in seen:
+            seen["keys"] = list(page.get("properties", {}).keys())
+        seen["count"] = seen.get("count", 0) + 1
+        yield page
+
+class Entry:
+    # One calendar entry. Emoji and source tag strings are interned so repeats share one object;
+    # the "emoji title" display string is built by the page script.
+    __slots__ = ("id", "title", "emoji", "source")
+
+    def __init__(self, page_id, title, emoji, source=""):
+        self.id = page_id
+        self.title = title
+        self.emoji = sys.intern(emoji)
+        self.source = sys.intern(source)
+
+def parse_data(raw_data, schema=None, source=None, calendar_data=None):
+    # raw_data can be any iterable (e.g. a stream from the store); only the compact entries are kept.
+    # Pass calendar_data to merge another source into an existing index.
+    # Map "YYYY-MM-DD" -> List of Entry
+    if calendar_data is None:
+        calendar_data = {}
+    source = source or {}
+    tag = source.get("tag", "")
+    default_emoji = source.get("emoji", "📝")
+    compiled = compile_source_schema(schema, source) if schema else None
+    emoji_getter = None
     
     for page in raw_data:
-        props = page.get("properties", {})
+        if compiled is None:
+            # No cached schema: compile the extractors once from the first row
+            compiled = compile_source_schema(property_extractors.schema_from_page(page), source)
+        if emoji_getter is None and source.get("emoji_property"):
+            emoji_getter = compiled.getters.get(source["emoji_property"])
         page_id = page.get("id").replace("-", "")
         
-        # 1. Smart Date Discovery
-        date_str = None
-        
-        # Priority A: Look for type "date"
-        for key, val in props.items():
-            if val.get("type") == "date":
-                date_obj = val.get("date")
-                if date_obj:
-                    date_str = date_obj.get("start")
-                break
-        
-        # Priority B: Look for "created_time" (system property is root level, but sometimes aliases exist)
-        # Actually page["created_time"] is always available at root.
-        if not date_str:
-            # Check if user wants to use Created Time property
-            for key, val in props.items():
-                if val.get("type") == "created_time":
-                    date_str = val.get("created_time")
-                    break
-
-        # Priority C: Fallback to Page Created Time if absolutely no date property found
-        if not date_str:
-            date_str = page.get("created_time")
-
+        # 1. Date: the chosen date property, falling back to the page created_time
+        date_str = compiled.date(page)
         if not date_str: continue 
         date_str = date_str[:10] # YYYY-MM-DD
         
-        # 2. Smart Title Discovery
-        title = "Untitled"
-        for key, val in props.items():
-            if val.get("type") == "title":
-                title_list = val.get("title", [])
-                if title_list:
-                    title = "".join([t.get("plain_text", "") for t in title_list])
-                break
+        # 2. Title
+        title = compiled.title(page) or "Untitled"
                 
         # 3. Icon
         icon = page.get("icon", {})
-        emoji = icon.get("emoji") if icon and icon.get("type") == "emoji" else "📝"
+        emoji = icon.get("emoji") if icon and icon.get("type") == "emoji" else None
+        if not emoji and emoji_getter:
+            emoji = emoji_getter(page)
+        emoji = emoji or default_emoji
         
         if date_str not in calendar_data:
             calendar_data[date_str] = []
             
-        calendar_data[date_str].append({
-            "id": page_id,
-            "title": title,
-            "emoji": emoji,
-            "display": f"{emoji} {title}"
-        })
+        calendar_data[date_str].append(Entry(page_id, title, emoji, tag))
         
     return calendar_data
 
-def generate_interactive_html(calendar_data, error_message=None):
-    # Pass data as JSON
-    data_json = json.dumps(calendar_data)
+def encode_calendar_data(calendar_data):
+    """
+    Compact JSON for the page: each distinct emoji and source tag is listed once and entries
+    are [emoji index, title, dashless id, source index] rows keyed by date.
+    """
+    emojis = {}
+    sources = {}
+    days = {}
+    for date_str in sorted(calendar_data):
+        days[date_str] = [[emojis.setdefault(e.emoji, len(emojis)), e.title, e.id,
+                           sources.setdefault(e.source, len(sources))]
+                          for e in calendar_data[date_str]]
+    data_json = json.dumps({"emoji": list(emojis), "sources": list(sources), "days": days},
+                           ensure_ascii=False, separators=(",", ":"))
+    # Keep titles from closing the <script> tag
+    return data_json.replace("</", "<\\/")
+
+# Exit status when the calendar matches the last published build, so the deploy step can be skipped
+UNCHANGED_EXIT_CODE = 3
+PUBLISH_STATE_FILE = "calendar_publish.json"
+
+def template_version():
+    # Any change to this file or the page template counts as a new template
+    digest = hashlib.sha256()
+    for path in (os.path.abspath(__file__), TEMPLATE_PATH, html_minify.__file__):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def content_hash(calendar_data, error_message=None, sharded=False):
+    digest = hashlib.sha256()
+    digest.update(template_version().encode("utf-8"))
+    digest.update(json.dumps({"error": error_message, "sharded": sharded}).encode("utf-8"))
+    digest.update(encode_calendar_data(calendar_data).encode("utf-8"))
+    return digest.hexdigest()
+
+# Month shards are written here, next to index.html (CALENDAR_SHARDS=1)
+SHARD_DIR = "calendar_data"
+
+def write_month_shards(calendar_data, out_dir=SHARD_DIR):
+    """
+    Writes one {out_dir}/YYYY-MM.json per month that has entries, removing shards
+    for months that no longer do. Returns the sorted list of months.
+    """
+    by_month = {}
+    for date_str, entries in calendar_data.items():
+        by_month.setdefault(date_str[:7], {})[date_str] = entries
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name in os.listdir(out_dir):
+        if name.split(".json")[0] not in by_month:
+            os.remove(os.path.join(out_dir, name))
+    sizes = {}
+    for month_key, month_data in by_month.items():
+        sizes.update(write_artifact(os.path.join(out_dir, f"{month_key}.json"), encode_calendar_data(month_data)))
+    return sorted(by_month), sizes
+
+def generate_interactive_html(calendar_data, error_message=None, shard_months=None, content_hash=""):
+    # Pass data as JSON, or (shard mode) only the list of months that have a shard file
+    if shard_months is None:
+        data_json = encode_calendar_data(calendar_data)
+        months_json = "null"
+    else:
+        data_json = "null"
+        months_json = json.dumps(shard_months, separators=(",", ":"))
     
     # Determine header text
     header_text = "Loading..."
     if error_message:
         header_text = error_message
     
-    html = f"""
-    <!DOCTYPE html>
-    <html lang="ko">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Milk's Month</title>
-        <style>
-            /* ... (keep existing CSS) ... */
-            ::-webkit-scrollbar {{ display: none; }}
-            html {{ -ms-overflow-style: none; scrollbar-width: none; }}
-            
-            :root {{
-                --bg-color: #ffffff;
-                --text-color: #37352f;
-                --grid-border: #e0e0e0;
-                --hover-bg: #f7f7f5;
-                /* Pet Theme Colors */
-                --today-bg: #edf9ee;
-                --today-text: #1b5e20;
-                --underline-color: #81C784;
-            }}
-            body {{
-                font-family: "Courier New", Courier, monospace;
-                margin: 0;
-                padding: 12px 20px 20px 20px;
-                background-color: var(--bg-color);
-                color: var(--text-color);
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-                user-select: none;
-            }}
-            
-            .header-container {{
-                display: flex;
-                justify-content: flex-start; /* Align left */
-                align-items: center;
-                gap: 15px; /* Space between title and buttons */
-                width: 100%;
-                max-width: 600px;
-                margin-bottom: 10px;
-            }}
-            
-            h1 {{
-                margin: 0;
-                font-size: 0.9em; 
-                font-weight: bold; 
-                text-align: left;
-                color: { 'red' if error_message else 'inherit' }; /* Highlight error */
-            }}
-            /* v2.1 Debug Probe */
-            
-            .nav-btn {{
-                background: none;
-                border: 1px solid transparent;
-                cursor: pointer;
-                font-family: "Courier New", Courier, monospace;
-                font-size: 0.5em; /* Adjusted to 0.5em as requested */
-                color: #999;
-                padding: 0 1px; /* Tighter spacing */
-                border-radius: 4px;
-                transition: color 0.2s, background 0.2s;
-            }}
-            .nav-btn:hover {{
-                color: #333;
-                background: #f0f0f0;
-            }}
-            
-            .calendar-grid {{
-                display: grid;
-                grid-template-columns: repeat(7, 1fr);
-                gap: 8px;
-                width: 100%;
-                max-width: 600px;
-            }}
-            
-            .day-header {{
-                text-align: center;
-                font-size: 0.8em;
-                color: #999;
-                padding-bottom: 8px;
-            }}
-            
-            .day-cell {{
-                aspect-ratio: 1 / 1;
-                border-radius: 8px;
-                background: #fff;
-                box-shadow: 0 0 0 1px var(--grid-border);
-                position: relative;
-                cursor: pointer;
-                transition: background 0.2s;
-                display: flex;
-                justify-content: center;
-                align-items: center;
-                font-size: 0.85em;
-                font-weight: bold;
-            }}
-            
-            .day-cell:hover {{
-                background: var(--hover-bg);
-                z-index: 10;
-            }}
-            
-            .day-cell.empty {{
-                background: transparent;
-                box-shadow: none;
-                cursor: default;
-            }}
-            
-            .day-cell.today {{
-                background: var(--today-bg);
-                color: var(--today-text);
-                box-shadow: 0 0 0 1px var(--today-text);
-            }}
-
-            .tooltip {{
-                visibility: hidden;
-                background-color: #333;
-                color: #fff;
-                text-align: left;
-                border-radius: 6px;
-                padding: 8px 12px;
-                position: absolute;
-                z-index: 1000;
-                bottom: 125%; 
-                left: 50%;
-                transform: translateX(-50%);
-                width: max-content;
-                max-width: 300px;
-                opacity: 0;
-                transition: opacity 0.3s;
-                font-size: 0.8em;
-                font-weight: normal;
-                box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-                white-space: normal;
-            }}
-            
-            .tooltip::after {{
-                content: "";
-                position: absolute;
-                top: 100%;
-                left: 50%;
-                margin-left: -5px;
-                border-width: 5px;
-                border-style: solid;
-                border-color: #333 transparent transparent transparent;
-            }}
-            
-            .day-cell:hover .tooltip {{
-                visibility: visible;
-                opacity: 1;
-            }}
-            
-            .entry-item {{ margin-bottom: 4px; }}
-            .entry-item:last-child {{ margin-bottom: 0; }}
-
-            .has-entry .day-number {{
-                border-bottom: 3px solid var(--underline-color);
-                padding-bottom: 2px;
-                display: inline-block;
-                line-height: 1.2;
-            }}
-            .day-number {{ pointer-events: none; }}
-
-            .nav-container {{
-                display: flex;
-                align-items: center;
-                gap: 2px;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="header-container">
-            <h1 id="monthLabel">{header_text}</h1>
-            <div class="nav-container">
-                <button class="nav-btn" id="prevBtn">◀</button>
-                <button class="nav-btn" id="nextBtn">▶</button>
-            </div>
-        </div>
-        
-        <div class="calendar-grid" id="calendarGrid">
-            <!-- Headers and Days inserted by JS -->
-        </div>
+    return render_template({
+        "content_hash": content_hash,
+        "title_color": "red" if error_message else "inherit", # Highlight error
+        "header_text": html.escape(header_text),
+        "data_json": data_json,
+        "months_json": months_json,
+        "shard_dir": SHARD_DIR,
+    })
 
-        <script>
-            const eventData = {data_json};
-            let currentDate = new Date(); // Defaults to today on client side
+def write_artifact(path, text):
+    """
+    Writes path plus precompressed path.gz (and path.br when brotli is installed).
+    Returns {file name: bytes}.
+    """
+    data = text.encode("utf-8")
+    variants = {path: data, path + ".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli:
+        variants[path + ".br"] = brotli.compress(data, quality=11)
+    elif os.path.exists(path + ".br"):
+        os.remove(path + ".br") # Don't leave a stale variant behind
+    for name, payload in variants.items():
+        with open(name, "wb") as f:
+            f.write(payload)
+    return {name: len(payload) for name, payload in variants.items()}
 
-            const monthNames = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
-                                "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"];
+def report_sizes(sizes):
+    for name, size in sizes.items():
+        print(f"  {name}: {size:,} bytes")
 
-            function renderCalendar() {{
-                const year = currentDate.getFullYear();
-                const month = currentDate.getMonth(); // 0-11
-                
-                // Update Header if no error
-                const currentTitle = document.getElementById('monthLabel').innerText;
-                const isError = currentTitle.startsWith("Error") || 
-                                currentTitle.startsWith("Token") || 
-                                currentTitle.startsWith("Keys") || 
-                                currentTitle.startsWith("No Data") ||
-                                currentTitle.startsWith("Fetch");
-                                
-                if (!isError) {{
-                     const monthName = monthNames[month];
-                     document.getElementById('monthLabel').innerText = `${{year}} ${{monthName}}`;
-                }}
-                
-                // Calculate Grid
-                const firstDay = new Date(year, month, 1);
-                const lastDay = new Date(year, month + 1, 0); // Last day of current month
-                
-                const numDays = lastDay.getDate();
-                const startDayOfWeek = firstDay.getDay(); // 0 (Sun) - 6 (Sat)
-                
-                const grid = document.getElementById('calendarGrid');
-                grid.innerHTML = ''; // Clear previous
-                
-                // Day Headers
-                const days = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"];
-                days.forEach(d => {{
-                    const el = document.createElement('div');
-                    el.className = 'day-header';
-                    el.innerText = d;
-                    grid.appendChild(el);
-                }});
-                
-                // Empty cells before start
-                for (let i = 0; i < startDayOfWeek; i++) {{
-                    const el = document.createElement('div');
-                    el.className = 'day-cell empty';
-                    grid.appendChild(el);
-                }}
-                
-                // Days
-                const today = new Date();
-                const isCurrentMonth = (today.getFullYear() === year && today.getMonth() === month);
-                const todayDate = today.getDate();
-                
-                for (let d = 1; d <= numDays; d++) {{
-                    const cell = document.createElement('div');
-                    cell.className = 'day-cell';
-                    
-                    // construct YYYY-MM-DD string with padding
-                    const mStr = String(month + 1).padStart(2, '0');
-                    const dStr = String(d).padStart(2, '0');
-                    const dateKey = `${{year}}-${{mStr}}-${{dStr}}`;
-                    
-                    const entries = eventData[dateKey] || [];
-                    
-                    if (isCurrentMonth && d === todayDate) {{
-                        cell.classList.add('today');
-                    }}
-                    
-                    if (entries.length > 0) {{
-                        cell.classList.add('has-entry');
-                        
-                        // Create Tooltip
-                        let tooltipContent = '';
-                        entries.forEach(e => {{
-                            tooltipContent += `<div class="entry-item">${{e.display}}</div>`;
-                        }});
-                        
-                        const tooltip = document.createElement('div');
-                        tooltip.className = 'tooltip';
-                        tooltip.innerHTML = tooltipContent;
-                        cell.appendChild(tooltip);
-                    }} else {{
-                         const tooltip = document.createElement('div');
-                         tooltip.className = 'tooltip';
-                         tooltip.innerText = 'No Info';
-                         cell.appendChild(tooltip);
-                    }}
-                    
-                    const numSpan = document.createElement('span');
-                    numSpan.className = 'day-number';
-                    numSpan.innerText = d;
-                    cell.appendChild(numSpan);
-                    
-                    grid.appendChild(cell);
-                }}
-            }}
-
-            // Event Listeners
-            document.getElementById('prevBtn').addEventListener('click', () => {{
-                currentDate.setMonth(currentDate.getMonth() - 1);
-                renderCalendar();
-            }});
-            
-            document.getElementById('nextBtn').addEventListener('click', () => {{
-                currentDate.setMonth(currentDate.getMonth() + 1);
-                renderCalendar();
-            }});
-            
-            // Initial Render
-            renderCalendar();
-        </script>
-    </body>
-    </html>
+def build():
+    """
+    Syncs the sources and writes index.html (and the month shards).
+    Returns the exit code: 0 when published, UNCHANGED_EXIT_CODE when nothing changed.
     """
-    return html
-
-def main():
     token = os.environ.get("NOTION_TOKEN")
     
-    raw_data = []
+    streams = []
+    seen = {"count": 0}
     error_msg = None
     
     if not token:
         print("WARNING: Notion token missing. Generating empty calendar.")
         error_msg = "Token Missing"
     else:
-        # Dynamically find Health Log ID
-        db_id = find_health_log_id(token)
-        
-        if not db_id:
-            print("ERROR: 'Health Log' database not found.")
-            error_msg = "Health Log DB Not Found"
-        else:
-            print(f"Using Database ID: {db_id}")
-            print("Fetching Notion data...")
+        sources = load_sources()
+        full_sync = os.environ.get("HEALTH_LOG_FULL_SYNC") == "1"
+        months = window_months()
+        print(f"Window: {'all history' if months is None else f'+/- {months} months'}")
+        print(f"Fetching Notion data from {len(sources)} source(s)...")
+
+        # Sources sync concurrently; the shared rate limiter keeps the total within Notion's limit
+        def sync_one(source):
             try:
-                raw_data = fetch_health_log(token, db_id)
-                print(f"Fetched {len(raw_data)} entries.")
-                if not raw_data:
-                     print("DEBUG: Database is empty or no permissions to view children.")
-                     error_msg = "No Data Found (Empty DB)"
-                
+                return sync_source(token, source, months, full_sync), None
             except Exception as e:
-                print(f"Error executing fetch: {e}")
-                error_msg = f"Fetch Error: {str(e)[:20]}..."
+                return None, e
+
+        with ThreadPoolExecutor(max_workers=len(sources),
+                                initializer=notion_client.job_initializer()) as pool:
+            results = list(pool.map(sync_one, sources))
+
+        for source, (db_id, error) in zip(sources, results):
+            if isinstance(error, SourceNotFound):
+                print(f"ERROR: '{error}' database not found.")
+                error_msg = error_msg or f"{error} DB Not Found"
+            elif error:
+                # Don't publish a calendar that is missing a source
+                print(f"Error executing fetch: {error}")
+                error_msg = error_msg or f"Fetch Error: {str(error)[:20]}..."
+            else:
+                print(f"[{source['tag']}] Using Database ID: {db_id}")
+                streams.append((source, workspace_catalog.get_schema(token, db_id),
+                                health_log_store.iter_pages(db_id)))
+        if error_msg:
+            streams = []
 
     print("Parsing data...")
-    calendar_data = parse_data(raw_data)
+    calendar_data = {}
+    for source, schema, pages in streams:
+        parse_data(counted(pages, seen), schema, source, calendar_data)
+    if token and not error_msg:
+        print(f"Fetched {seen['count']} entries.")
+        if not seen["count"]:
+            print("DEBUG: Database is empty or no permissions to view children.")
+            error_msg = "No Data Found (Empty DB)"
     
     # DEBUG: If raw data exists but calendar is empty, it's a parsing issue.
     # Show the available keys to the user.
-    if not error_msg and raw_data and not calendar_data:
-        first_props = raw_data[0].get("properties", {}).keys()
-        props_str = ", ".join(first_props)
+    if not error_msg and seen["count"] and not calendar_data:
+        props_str = ", ".join(seen["keys"])
         print(f"DEBUG: Parse failed. Available keys: {props_str}")
         error_msg = f"Keys: {props_str[:50]}..." # Truncate for header
     
+    sharded = os.environ.get("CALENDAR_SHARDS") == "1"
+    build_hash = content_hash(calendar_data, error_msg, sharded)
+    published = local_cache.load_json(PUBLISH_STATE_FILE, {})
+    if published.get("hash") == build_hash and os.environ.get("CALENDAR_FORCE_BUILD") != "1":
+        print(f"Calendar unchanged ({build_hash[:12]}). Skipping build.")
+        return UNCHANGED_EXIT_CODE
+
+    shard_months = None
+    shard_sizes = {}
+    if sharded:
+        shard_months, shard_sizes = write_month_shards(calendar_data)
+        print(f"Wrote {len(shard_months)} month shards to {SHARD_DIR}/.")
+
     print("Generating HTML...")
-    html_content = generate_interactive_html(calendar_data, error_msg)
+    html_content = generate_interactive_html(calendar_data, error_msg, shard_months, build_hash)
     
-    with open("index.html", "w", encoding="utf-8") as f:
-        f.write(html_content)
+    sizes = write_artifact("index.html", html_content)
         
     print("index.html created successfully.")
+    report_sizes(sizes)
+    if shard_sizes:
+        for suffix in (".json", ".json.gz", ".json.br"):
+            total = sum(size for name, size in shard_sizes.items() if name.endswith(suffix))
+            if total:
+                print(f"  {SHARD_DIR}/*{suffix}: {total:,} bytes total")
+    local_cache.save_json(PUBLISH_STATE_FILE, {"hash": build_hash})
+    return 0
+
+def main():
+    notion_metrics.start_run("build_calendar")
+    report_memory = "--report-memory" in sys.argv
+    if report_memory:
+        tracemalloc.start()
+    try:
+        return build()
+    finally:
+        # Reported on every exit path, including the usual "unchanged" one
+        if report_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"Peak Python memory: {peak / 1024 / 1024:.1f} MB")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,16 +1,9 @@
 import os
-import requests
 import json
+import notion_client
 from datetime import datetime
 
 def create_pet_database(token, page_id):
-    url = "https://api.notion.com/v1/databases"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
     payload = {
         "parent": {
             "type": "page_id",
@@ -117,7 +110,7 @@ def create_pet_database(token, page_id):
         }
     }
     
-    response = requests.post(url, headers=headers, json=payload)
+    response = notion_client.post(token, "/databases", payload)
     if response.status_code == 200:
         db_data = response.json()
         print(f"데이터베이스가 성공적으로 생성되었습니다! ID: {db_data['id']}")
@@ -128,13 +121,6 @@ def create_pet_database(token, page_id):
         return None
 
 def add_pet_entry(token, database_id, name, birthday):
-    url = "https://api.notion.com/v1/pages"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
     payload = {
         "parent": {
             "database_id": database_id
@@ -170,7 +156,7 @@ def add_pet_entry(token, database_id, name, birthday):
         }
     }
     
-    response = requests.post(url, headers=headers, json=payload)
+    response = notion_client.post(token, "/pages", payload)
     if response.status_code == 200:
         print(f"'{name}' 강아지 정보가 추가되었습니다.")
     else:
@@ -197,5 +183,7 @@ def main():
         # Actually update_age.py will be updated to find it dynamically or use this ID.
         print("\n[완료] Notion 페이지를 확인해보세요!")
 
+    notion_client.print_connection_stats()
+
 if __name__ == "__main__":
     main()
@@ -1,39 +1,26 @@
 import os
-import requests
+import sys
+import notion_client
+import workspace_catalog
 
-def list_databases():
+def list_databases(refresh=True):
     token = os.environ.get("NOTION_TOKEN")
     if not token:
         print("Error: NOTION_TOKEN missing")
         return
 
-    url = "https://api.notion.com/v1/search"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
-    payload = {
-        "filter": {
-            "value": "database",
-            "property": "object"
-        },
-        "page_size": 100
-    }
-    
-    res = requests.post(url, headers=headers, json=payload)
-    if res.status_code != 200:
-        print(f"Error searching: {res.text}")
+    try:
+        catalog = workspace_catalog.load_catalog(token, refresh=refresh)
+    except notion_client.NotionAPIError as e:
+        print(f"Error searching: {e}")
         return
         
-    data = res.json()
-    print(f"Found {len(data['results'])} databases:")
-    for db in data['results']:
-        title = "Untitled"
-        if db.get("title") and len(db["title"]) > 0:
-            title = db["title"][0]["plain_text"]
-        print(f"- [{title}] ID: {db['id']}")
+    databases = catalog["databases"]
+    print(f"Found {len(databases)} databases:")
+    for db_id, info in databases.items():
+        title = info["title"] or "Untitled"
+        print(f"- [{title}] ID: {db_id}")
         
 if __name__ == "__main__":
-    list_databases()
+    # --cached: print the local catalog without calling Notion (if it is still fresh)
+    list_databases(refresh="--cached" not in sys.argv)
@@ -1,17 +1,12 @@
 import os
-import requests
 import json
+import notion_client
 
 def fixed_widget():
     token = os.environ.get("NOTION_TOKEN")
     page_id = os.environ.get("NOTION_PAGE_ID")
     
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
+    url = f"/blocks/{page_id}/children"
     
     payload = {
         "children": [
@@ -54,7 +49,7 @@ def fixed_widget():
     print("--- Sending Payload ---")
     print(json.dumps(payload, indent=2))
     
-    res = requests.patch(url, headers=headers, json=payload)
+    res = notion_client.patch(token, url, payload)
     print("\n--- Response ---")
     print(f"Status: {res.status_code}")
     print(res.text)
@@ -0,0 +1,152 @@
+import datetime
+import itertools
+import json
+import os
+import sqlite3
+import local_cache
+
+STORE_FILE = "health_log.sqlite3"
+
+# 증분 동기화로는 삭제/보관된 페이지를 알 수 없으므로 주기적으로 전체 대조합니다.
+RECONCILE_INTERVAL = datetime.timedelta(hours=int(os.environ.get("HEALTH_LOG_RECONCILE_HOURS", 24)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id TEXT PRIMARY KEY,
+    db_id TEXT NOT NULL,
+    created_time TEXT,
+    last_edited_time TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_db ON pages (db_id, created_time);
+CREATE TABLE IF NOT EXISTS sync_state (
+    db_id TEXT PRIMARY KEY,
+    watermark TEXT,
+    last_reconcile TEXT,
+    scope TEXT
+);
+"""
+
+def connect(path=None):
+    # 여러 DB 를 동시에 동기화할 때 짧은 쓰기 트랜잭션끼리 기다릴 수 있도록 timeout 을 둡니다.
+    conn = sqlite3.connect(path or local_cache.cache_path(STORE_FILE), timeout=30)
+    conn.executescript(SCHEMA)
+    try:
+        # scope 컬럼이 없던 예전 캐시 파일
+        conn.execute("ALTER TABLE sync_state ADD COLUMN scope TEXT")
+    except sqlite3.OperationalError:
+        pass
+    return conn
+
+def _utcnow():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def _parse_time(value):
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def get_state(conn, db_id):
+    row = conn.execute("SELECT watermark, last_reconcile, scope FROM sync_state WHERE db_id = ?", (db_id,)).fetchone()
+    return row if row else (None, None, None)
+
+def _needs_reconcile(watermark, last_reconcile, full, scope_changed=False):
+    if full or scope_changed or not watermark or not last_reconcile:
+        return True
+    return _utcnow() - _parse_time(last_reconcile) >= RECONCILE_INTERVAL
+
+STAGING = """
+CREATE TEMP TABLE IF NOT EXISTS incoming (
+    id TEXT PRIMARY KEY,
+    created_time TEXT,
+    last_edited_time TEXT,
+    data TEXT NOT NULL,
+    gone INTEGER NOT NULL
+)
+"""
+
+def _stage(conn, pages):
+    # 보관(archived)/휴지통 페이지는 gone 으로 표시해 두었다가 반영할 때 지웁니다.
+    conn.executemany(
+        "INSERT OR REPLACE INTO incoming (id, created_time, last_edited_time, data, gone) VALUES (?, ?, ?, ?, ?)",
+        [(p["id"], p.get("created_time"), p.get("last_edited_time"), json.dumps(p, ensure_ascii=False),
+          int(bool(p.get("archived") or p.get("in_trash")))) for p in pages]
+    )
+
+def _batches(items, size=100):
+    items = iter(items)
+    while True:
+        batch = list(itertools.islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+def sync(token, db_id, fetch, full=False, conn=None, scope=None, covers=None):
+    """
+    Notion DB 를 로컬 SQLite 로 동기화합니다.
+    평소에는 watermark 이후에 수정된 페이지만 가져와서 upsert 하고,
+    reconcile 주기가 지났거나 full=True 면 전체를 가져와 삭제된 페이지까지 정리합니다.
+    fetch(token, db_id, filter) 는 페이지를 차례로 내주는 iterable 을 반환하는 함수이며, 100개씩 받는 대로 저장합니다.
+    scope 는 fetch 가 가져오는 범위(기간, 속성 등)를 나타내는 문자열로, 지난번과 다르면 전체 대조합니다.
+    covers(page) 는 전체 대조 때 fetch 가 돌려줄 범위(예: 기간)에 드는 페이지인지 알려 줍니다.
+    주어지면 전체 대조에서 그 범위 안의 빠진 페이지만 지우고, 범위 밖의 페이지(예전에 받아 둔 기록)는 남깁니다.
+    반환값: (가져온 페이지 수, 전체 대조 여부)
+    """
+    conn = conn or connect()
+    watermark, last_reconcile, last_scope = get_state(conn, db_id)
+    reconcile = _needs_reconcile(watermark, last_reconcile, full, scope != last_scope)
+    started = _utcnow().isoformat()
+
+    if reconcile:
+        pages = fetch(token, db_id, None)
+    else:
+        # Notion 의 last_edited_time 은 분 단위라서 같은 분에 수정된 페이지를 놓치지 않도록 on_or_after 사용
+        pages = fetch(token, db_id, {
+            "timestamp": "last_edited_time",
+            "last_edited_time": {"on_or_after": watermark}
+        })
+
+    count = 0
+    new_watermark = watermark
+    # 받는 동안은 연결별 TEMP 테이블에만 쓰고, 다 받은 뒤 짧은 트랜잭션 하나로 반영합니다.
+    # 그래서 다른 DB 의 동기화가 네트워크를 기다리는 동안 쓰기 잠금을 잡고 있지 않고,
+    # 가져오는 도중 실패하면 pages 는 이전 상태 그대로 남습니다.
+    conn.execute(STAGING)
+    conn.execute("DELETE FROM incoming")
+    for batch in _batches(pages):
+        _stage(conn, batch)
+        edited = [p["last_edited_time"] for p in batch if p.get("last_edited_time")]
+        if edited:
+            new_watermark = max(edited + ([new_watermark] if new_watermark else []))
+        count += len(batch)
+    conn.commit()
+
+    with conn:
+        if reconcile and covers is None:
+            conn.execute("DELETE FROM pages WHERE db_id = ?", (db_id,))
+        elif reconcile:
+            rows = conn.execute("SELECT id, data FROM pages WHERE db_id = ? AND id NOT IN (SELECT id FROM incoming)",
+                                (db_id,)).fetchall()
+            missing = [(page_id,) for page_id, data in rows if covers(json.loads(data))]
+            conn.executemany("DELETE FROM pages WHERE id = ?", missing)
+        conn.execute(
+            "INSERT OR REPLACE INTO pages (id, db_id, created_time, last_edited_time, data) "
+            "SELECT id, ?, created_time, last_edited_time, data FROM incoming WHERE NOT gone", (db_id,))
+        conn.execute("DELETE FROM pages WHERE id IN (SELECT id FROM incoming WHERE gone)")
+        conn.execute(
+            "INSERT OR REPLACE INTO sync_state (db_id, watermark, last_reconcile, scope) VALUES (?, ?, ?, ?)",
+            (db_id, new_watermark, started if reconcile else last_reconcile, scope)
+        )
+    conn.execute("DELETE FROM incoming")
+    conn.commit()
+    return count, reconcile
+
+def iter_pages(db_id, conn=None):
+    """
+    저장된 페이지를 created_time 최신순으로 하나씩 읽어서 내줍니다.
+    """
+    conn = conn or connect()
+    rows = conn.execute("SELECT data FROM pages WHERE db_id = ? ORDER BY created_time DESC, id", (db_id,))
+    for (data,) in rows:
+        yield json.loads(data)
+
+def load_pages(db_id, conn=None):
+    return list(iter_pages(db_id, conn))
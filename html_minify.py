@@ -0,0 +1,54 @@
+"""
+템플릿용 간단한 minifier.
+안전한 변환만 합니다: 주석 제거, 들여쓰기/빈 줄 제거, CSS 구분자 주변 공백 제거.
+JS 는 줄바꿈을 그대로 두므로 세미콜론 자동 삽입(ASI)에 의존하는 코드도 깨지지 않습니다.
+"""
+import re
+
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+CSS_SPACE_AROUND = re.compile(r"\s*([{};,])\s*")
+CSS_SPACE_AFTER_COLON = re.compile(r":\s+")
+HTML_COMMENT = re.compile(r"<!--.*?-->", re.S)
+BLOCK = re.compile(r"(<(style|script)[^>]*>)(.*?)(</\2>)", re.S)
+
+def minify_css(css):
+    css = CSS_COMMENT.sub("", css)
+    css = re.sub(r"\s+", " ", css)
+    css = CSS_SPACE_AROUND.sub(r"\1", css)
+    # 선택자의 " :hover" 같은 공백은 의미가 있으므로 콜론 뒤만 줄입니다.
+    css = CSS_SPACE_AFTER_COLON.sub(":", css)
+    return css.replace(";}", "}").strip()
+
+def _strip_js_comment(line):
+    if line.startswith("//"):
+        return ""
+    index = line.find(" //")
+    # 문자열 안의 // (URL 등) 를 건드리지 않도록 따옴표가 없는 줄만 처리
+    if index != -1 and not any(q in line[:index] for q in "'\"`"):
+        return line[:index].rstrip()
+    return line
+
+def minify_js(js):
+    lines = (_strip_js_comment(line.strip()) for line in js.splitlines())
+    return "\n".join(line for line in lines if line)
+
+def minify_html(html):
+    def block(match):
+        open_tag, tag, content, close_tag = match.groups()
+        content = minify_css(content) if tag == "style" else minify_js(content)
+        return open_tag + content + close_tag
+
+    # style/script 안은 따로 줄이고, 나머지 HTML 은 주석과 태그 사이 공백을 없앱니다.
+    parts = []
+    last = 0
+    for match in BLOCK.finditer(html):
+        parts.append(_minify_markup(html[last:match.start()]))
+        parts.append(block(match))
+        last = match.end()
+    parts.append(_minify_markup(html[last:]))
+    return "".join(parts)
+
+def _minify_markup(markup):
+    markup = HTML_COMMENT.sub("", markup)
+    markup = "".join(line.strip() for line in markup.splitlines())
+    return re.sub(r">\s+<", "><", markup)
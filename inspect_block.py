@@ -1,22 +1,15 @@
 import os
-import requests
 import json
+import notion_client
+import block_walker
+import page_mirror
 
 def get_all_blocks(token, page_id):
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28"
-    }
-    
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        print(f"Error: {response.status_code}")
-        print(response.text)
+    try:
+        return block_walker.fetch_all_children(token, page_id)
+    except notion_client.NotionAPIError as e:
+        print(f"Error: {e}")
         return []
-        
-    data = response.json()
-    return data.get("results", [])
 
 def main():
     token = os.environ.get("NOTION_TOKEN")
@@ -26,46 +19,44 @@ def main():
         print("Set NOTION_TOKEN and NOTION_PAGE_ID env vars")
         return
 
+# Only fetch children for layout blocks we expect (columns, toggles) to save time/limits
+CONTAINER_TYPES = ["column_list", "column", "toggle", "callout"]
+
+def is_container(block):
+    return block.get("type") in CONTAINER_TYPES
+
+def write_equations(block, file_handle):
+    block_type = block.get("type")
+    block_id = block.get("id")
+    
+    # Check for equation content in this block
+    if block_type in ["callout", "paragraph", "heading_1", "heading_2", "heading_3", "quote", "to_do", "toggle"]:
+        rich_text = block.get(block_type, {}).get('rich_text', [])
+        for rt in rich_text:
+            if rt.get('type') == 'equation':
+                file_handle.write(f"--- FOUND EQUATION IN {block_type.upper()} ({block_id}) ---\n")
+                file_handle.write(rt['equation']['expression'] + "\n")
+                file_handle.write("---------------------------------------------\n")
+    
+    elif block_type == "equation":
+        file_handle.write(f"--- FOUND EQUATION BLOCK ({block_id}) ---\n")
+        file_handle.write(block['equation']['expression'] + "\n")
+        file_handle.write("---------------------------------------------\n")
+
 def scan_blocks_recursive(token, block_ids, file_handle, depth=0):
-    for block_id in block_ids:
-        # Fetch children of this block (or if it's the page, we already have the list)
-        # But wait, we need to minimize API calls.
-        # Let's just define a function that processes a list of blocks and recurses if needed.
-        pass
+    # Walk all descendants of the given containers, one parallel request batch per level
+    def visit(block, block_depth):
+        write_equations(block, file_handle)
+    
+    block_walker.walk_blocks(token, block_ids, visit, should_descend=is_container)
 
 def process_blocks(token, blocks, file_handle):
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28"
-    }
-    
     for block in blocks:
-        block_type = block.get("type")
-        block_id = block.get("id")
-        
-        # Check for equation content in this block
-        if block_type in ["callout", "paragraph", "heading_1", "heading_2", "heading_3", "quote", "to_do", "toggle"]:
-            rich_text = block.get(block_type, {}).get('rich_text', [])
-            for rt in rich_text:
-                if rt.get('type') == 'equation':
-                    file_handle.write(f"--- FOUND EQUATION IN {block_type.upper()} ({block_id}) ---\n")
-                    file_handle.write(rt['equation']['expression'] + "\n")
-                    file_handle.write("---------------------------------------------\n")
-        
-        elif block_type == "equation":
-            file_handle.write(f"--- FOUND EQUATION BLOCK ({block_id}) ---\n")
-            file_handle.write(block['equation']['expression'] + "\n")
-            file_handle.write("---------------------------------------------\n")
-
-        # Recursion for container blocks
-        if block.get("has_children"):
-            # Only fetch children for layout blocks we expect (columns, toggles) to save time/limits
-            if block_type in ["column_list", "column", "toggle", "callout"]:
-                url = f"https://api.notion.com/v1/blocks/{block_id}/children"
-                response = requests.get(url, headers=headers)
-                if response.status_code == 200:
-                    children = response.json().get("results", [])
-                    process_blocks(token, children, file_handle)
+        write_equations(block, file_handle)
+    
+    containers = [b.get("id") for b in blocks if b.get("has_children") and is_container(b)]
+    if containers:
+        scan_blocks_recursive(token, containers, file_handle)
 
 def main():
     token = os.environ.get("NOTION_TOKEN")
@@ -75,14 +66,16 @@ def main():
         print("Set NOTION_TOKEN and NOTION_PAGE_ID env vars")
         return
 
-    # Initial fetch of page blocks
-    top_level_blocks = get_all_blocks(token, page_id)
-    
-    if top_level_blocks:
-        with open("all_equations.txt", "w", encoding="utf-8") as f:
-            process_blocks(token, top_level_blocks, f)
-        print("Equations saved to all_equations.txt")
-    else:
-        print("No blocks found.")
+    # Full scan: children are served from the local page mirror when it is current
+    with page_mirror.mirrored(token, page_id):
+        top_level_blocks = get_all_blocks(token, page_id)
+        
+        if top_level_blocks:
+            with open("all_equations.txt", "w", encoding="utf-8") as f:
+                process_blocks(token, top_level_blocks, f)
+            print("Equations saved to all_equations.txt")
+        else:
+            print("No blocks found.")
+    notion_client.print_connection_stats()
 if __name__ == "__main__":
     main()
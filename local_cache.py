@@ -0,0 +1,30 @@
+import json
+import os
+import threading
+
+# 실행 사이에 유지되는 로컬 상태(위젯 레지스트리 등)를 두는 곳.
+# GitHub Actions 에서는 actions/cache 로 이 디렉터리를 보존합니다.
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".notion_cache")
+
+def cache_path(name):
+    cache_dir = os.path.expanduser(os.environ.get("NOTION_CACHE_DIR", DEFAULT_CACHE_DIR))
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, name)
+
+def load_json(name, default=None):
+    path = cache_path(name)
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache file {path}: {e}")
+        return default
+
+def save_json(name, data):
+    path = cache_path(name)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
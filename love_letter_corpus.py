@@ -0,0 +1,127 @@
+import datetime
+import os
+from concurrent.futures import ThreadPoolExecutor
+import notion_client
+import local_cache
+from block_walker import fetch_all_children
+
+CORPUS_FILE = "love_letters.json"
+
+# 삭제/보관된 편지는 증분 조회로 알 수 없으므로 주기적으로 전체 목록과 대조합니다.
+RECONCILE_INTERVAL = datetime.timedelta(hours=int(os.environ.get("LOVE_LETTER_RECONCILE_HOURS", 24)))
+
+TITLE_PROPERTY = "하고싶은 말"
+
+# 바뀐 편지의 본문(children)을 동시에 가져올 수. 실제 처리량은 rate_limiter 가 제한합니다.
+FETCH_CONCURRENCY = 4
+
+def _utcnow():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def _parse_time(value):
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def _is_stale(letter, page):
+    """
+    본문을 다시 읽어야 하는 편지인지 판단합니다.
+    last_edited_time 이 분 단위로 잘리기 때문에, 수정 시각과 같은 분 안에 읽은 본문은
+    그 뒤의 수정을 놓쳤을 수 있어서 1분 이상 지난 뒤에 읽은 경우만 믿습니다.
+    """
+    edited = page.get("last_edited_time")
+    if not letter or letter.get("last_edited_time") != edited:
+        return True
+    fetched = letter.get("fetched")
+    if not edited or not fetched:
+        return True
+    return _parse_time(fetched) - _parse_time(edited) < datetime.timedelta(minutes=1)
+
+def _plain_text(rich_text):
+    return "".join(t.get("plain_text", "") for t in rich_text)
+
+def query_letters(token, db_id, query_filter=None):
+    """
+    편지 DB 를 끝까지 페이지네이션해서 페이지 목록을 반환합니다.
+    """
+    pages = []
+    payload = {"page_size": 100}
+    if query_filter:
+        payload["filter"] = query_filter
+    while True:
+        res = notion_client.post(token, f"/databases/{db_id}/query", payload)
+        notion_client.raise_for_error(res)
+        data = res.json()
+        pages.extend(data.get("results", []))
+        if not data.get("has_more") or not data.get("next_cursor"):
+            return pages
+        payload = dict(payload, start_cursor=data["next_cursor"])
+
+def render_lines(page, blocks):
+    """
+    본문의 paragraph 들을 줄 목록으로 만듭니다. 본문이 비어 있으면 제목을 씁니다.
+    """
+    lines = []
+    for block in blocks:
+        if block.get("type") == "paragraph":
+            plain_text = _plain_text(block.get("paragraph", {}).get("rich_text", []))
+            if plain_text.strip():
+                lines.append(plain_text)
+    if not lines:
+        title = _plain_text(page.get("properties", {}).get(TITLE_PROPERTY, {}).get("title", []))
+        lines.append(title or "사랑해")
+    return lines
+
+def refresh(token, db_id, full=False):
+    """
+    로컬 편지 모음을 갱신하고 {page_id: {"last_edited_time", "fetched", "lines"}} 를 반환합니다.
+    평소에는 watermark 이후에 수정된 편지만 조회해서 본문이 바뀐 편지만 다시 읽고,
+    reconcile 주기가 지났거나 full=True 면 전체 목록으로 삭제된 편지까지 정리합니다.
+    """
+    corpus = local_cache.load_json(CORPUS_FILE, {})
+    state = corpus.get(db_id.replace("-", ""), {})
+    letters = state.get("letters", {})
+    watermark = state.get("watermark")
+    last_reconcile = state.get("last_reconcile")
+    reconcile = (full or not watermark or not last_reconcile
+                 or _utcnow() - datetime.datetime.fromisoformat(last_reconcile) >= RECONCILE_INTERVAL)
+    started = _utcnow().isoformat()
+
+    if reconcile:
+        pages = query_letters(token, db_id)
+    else:
+        # last_edited_time 은 분 단위라서 같은 분에 수정된 편지를 놓치지 않도록 on_or_after 사용
+        pages = query_letters(token, db_id, {
+            "timestamp": "last_edited_time",
+            "last_edited_time": {"on_or_after": watermark}
+        })
+
+    live = [p for p in pages if not (p.get("archived") or p.get("in_trash"))]
+    for page in pages:
+        if page.get("archived") or page.get("in_trash"):
+            letters.pop(page["id"], None)
+    if reconcile:
+        live_ids = {p["id"] for p in live}
+        letters = {page_id: letter for page_id, letter in letters.items() if page_id in live_ids}
+
+    # 본문을 고치면 페이지 last_edited_time 도 바뀌므로, 달라졌거나 같은 분 안에 읽은 편지만 children 을 다시 읽습니다.
+    changed = [p for p in live if _is_stale(letters.get(p["id"]), p)]
+    if changed:
+        with ThreadPoolExecutor(max_workers=min(FETCH_CONCURRENCY, len(changed)),
+                                initializer=notion_client.job_initializer()) as pool:
+            bodies = list(pool.map(lambda p: fetch_all_children(token, p["id"]), changed))
+        for page, blocks in zip(changed, bodies):
+            letters[page["id"]] = {"last_edited_time": page.get("last_edited_time"),
+                                   "fetched": started,
+                                   "lines": render_lines(page, blocks)}
+
+    edited = [p["last_edited_time"] for p in pages if p.get("last_edited_time")]
+    if watermark:
+        edited.append(watermark)
+    corpus[db_id.replace("-", "")] = {
+        "watermark": max(edited) if edited else None,
+        "last_reconcile": started if reconcile else last_reconcile,
+        "letters": letters,
+    }
+    local_cache.save_json(CORPUS_FILE, corpus)
+    mode = "full reconcile" if reconcile else "incremental"
+    print(f"Love letters: {len(letters)} cached, {len(changed)} re-read ({mode}).")
+    return letters
@@ -0,0 +1,639 @@
+"""
+오프라인 실행용 로컬 Notion API 대역(stand-in) 서버.
+
+    python mock_notion_server.py --fixture fixtures/notion_workspace.json --port 8787
+    NOTION_API_BASE=http://127.0.0.1:8787/v1 NOTION_TOKEN=test NOTION_PAGE_ID=... python update_age.py
+
+스크립트가 쓰는 엔드포인트만 구현합니다:
+search, database 생성/조회/query(cursor, filter, sorts, filter_properties), page 생성/조회/수정, block 조회/수정/삭제, block children 조회/추가.
+--latency, --rate-429, --rate-5xx 로 지연과 오류를 주입할 수 있습니다.
+"""
+import argparse
+import copy
+import datetime
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def now_iso():
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+def normalize_id(object_id):
+    return object_id.replace("-", "").lower()
+
+def dashed_id(object_id):
+    raw = normalize_id(object_id)
+    if len(raw) != 32:
+        return object_id
+    return f"{raw[:8]}-{raw[8:12]}-{raw[12:16]}-{raw[16:20]}-{raw[20:]}"
+
+def new_id():
+    return str(uuid.uuid4())
+
+def render_rich_text(items):
+    """
+    요청 형식의 rich_text 를 Notion 응답 형식(plain_text 포함)으로 바꿉니다.
+    """
+    rendered = []
+    for item in items or []:
+        item = copy.deepcopy(item)
+        if "equation" in item:
+            item["type"] = "equation"
+            item["plain_text"] = item["equation"].get("expression", "")
+        else:
+            item["type"] = "text"
+            text = item.setdefault("text", {"content": item.get("plain_text", "")})
+            item["plain_text"] = text.get("content", "")
+            text.setdefault("link", None)
+        item.setdefault("annotations", {
+            "bold": False, "italic": False, "strikethrough": False,
+            "underline": False, "code": False, "color": "default"
+        })
+        item.setdefault("href", None)
+        rendered.append(item)
+    return rendered
+
+def render_property_value(prop_type, value):
+    if prop_type in ("title", "rich_text"):
+        return render_rich_text(value)
+    if prop_type == "date":
+        if value is None:
+            return None
+        return {"start": value.get("start"), "end": value.get("end"), "time_zone": None}
+    if prop_type == "multi_select":
+        return [{"name": v.get("name")} for v in value or []]
+    if prop_type == "select":
+        return {"name": value.get("name")} if value else None
+    return value
+
+def empty_property_value(prop_type):
+    if prop_type in ("title", "rich_text", "multi_select", "files", "people", "relation"):
+        return []
+    if prop_type == "checkbox":
+        return False
+    return None
+
+class ApiError(Exception):
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+class NotionStore:
+    """
+    블록 / 데이터베이스 / 페이지를 메모리에 보관하는 워크스페이스.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.blocks = {}       # id -> block object
+        self.children = {}     # parent id -> [child ids]
+        self.databases = {}    # id -> database object
+        self.rows = {}         # database id -> [page ids]
+        self.pages = {}        # id -> page object
+        self.sorted_rows = {}  # database id -> rows in query order (cache)
+
+    # ---- loading ----
+
+    def load(self, fixture):
+        with self.lock:
+            for page in fixture.get("pages", []):
+                self.add_page(page)
+            for db in fixture.get("databases", []):
+                self.add_database(db)
+
+    def add_page(self, spec, parent=None):
+        page_id = dashed_id(spec.get("id") or new_id())
+        created = spec.get("created_time") or now_iso()
+        page = {
+            "object": "page",
+            "id": page_id,
+            "created_time": created,
+            "last_edited_time": spec.get("last_edited_time") or created,
+            "archived": False,
+            "icon": spec.get("icon"),
+            "parent": parent or {"type": "workspace", "workspace": True},
+            "properties": spec.get("properties", {}),
+        }
+        self.pages[normalize_id(page_id)] = page
+        self.children.setdefault(normalize_id(page_id), [])
+        self.append_children(page_id, spec.get("children", []))
+        return page
+
+    def add_database(self, spec):
+        db_id = dashed_id(spec.get("id") or new_id())
+        parent_page = spec.get("parent_page_id")
+        now = now_iso()
+        properties = {}
+        for name, conf in spec.get("properties", {}).items():
+            prop_type = next(k for k in conf if k not in ("id", "name", "type"))
+            properties[name] = {"id": conf.get("id") or name[:4], "name": name,
+                                "type": prop_type, prop_type: conf[prop_type]}
+        title = spec.get("title", "")
+        if isinstance(title, str):
+            title = [{"text": {"content": title}}]
+        db = {
+            "object": "database",
+            "id": db_id,
+            "created_time": now,
+            "last_edited_time": now,
+            "title": render_rich_text(title),
+            "icon": spec.get("icon"),
+            "parent": {"type": "page_id", "page_id": dashed_id(parent_page)} if parent_page
+                      else {"type": "workspace", "workspace": True},
+            "properties": properties,
+            "archived": False,
+        }
+        key = normalize_id(db_id)
+        self.databases[key] = db
+        self.rows[key] = []
+        if parent_page:
+            plain = "".join(t["plain_text"] for t in db["title"])
+            self._insert_block(parent_page, {
+                "id": db_id, "type": "child_database", "child_database": {"title": plain}
+            })
+        for row in spec.get("rows", []):
+            self.add_row(db_id, row)
+        return db
+
+    def add_row(self, db_id, spec):
+        key = normalize_id(db_id)
+        db = self.databases.get(key)
+        if db is None:
+            raise ApiError(404, "object_not_found", f"Could not find database with ID: {db_id}.")
+        props = {}
+        given = spec.get("properties", {})
+        for name, schema in db["properties"].items():
+            prop_type = schema["type"]
+            if name in given:
+                value = given[name].get(prop_type, given[name])
+                value = render_property_value(prop_type, value)
+            else:
+                value = empty_property_value(prop_type)
+            props[name] = {"id": schema["id"], "type": prop_type, prop_type: value}
+        page = self.add_page({
+            "id": spec.get("id"),
+            "icon": spec.get("icon"),
+            "created_time": spec.get("created_time"),
+            "last_edited_time": spec.get("last_edited_time"),
+            "properties": props,
+            "children": spec.get("children", []),
+        }, parent={"type": "database_id", "database_id": db["id"]})
+        self.rows[key].append(normalize_id(page["id"]))
+        self.sorted_rows.pop(key, None)
+        return page
+
+    def query_rows(self, db_id):
+        key = normalize_id(db_id)
+        if key not in self.databases:
+            raise ApiError(404, "object_not_found", f"Could not find database with ID: {db_id}.")
+        if key not in self.sorted_rows:
+            pages = [self.pages[p] for p in self.rows[key] if not self.pages[p]["archived"]]
+            pages.sort(key=lambda p: p["created_time"], reverse=True)
+            self.sorted_rows[key] = pages
+        return self.sorted_rows[key]
+
+    def update_page(self, page_id, body):
+        page = self.pages.get(normalize_id(page_id))
+        if page is None:
+            raise ApiError(404, "object_not_found", f"Could not find page with ID: {page_id}.")
+        for name, value in body.get("properties", {}).items():
+            prop = page["properties"].get(name)
+            if prop is None:
+                raise ApiError(400, "validation_error", f"{name} is not a property that exists.")
+            prop_type = prop["type"]
+            prop[prop_type] = render_property_value(prop_type, value.get(prop_type, value))
+        if "icon" in body:
+            page["icon"] = body["icon"]
+        if "archived" in body:
+            page["archived"] = bool(body["archived"])
+        page["last_edited_time"] = now_iso()
+        self.sorted_rows.clear()
+        return page
+
+    # ---- blocks ----
+
+    def _insert_block(self, parent_id, spec):
+        b_type = spec["type"]
+        block_id = dashed_id(spec.get("id") or new_id())
+        now = now_iso()
+        payload = copy.deepcopy(spec.get(b_type, {}))
+        nested = payload.pop("children", None) or spec.get("children") or []
+        if "rich_text" in payload:
+            payload["rich_text"] = render_rich_text(payload["rich_text"])
+        parent_key = normalize_id(parent_id)
+        if parent_key in self.pages:
+            parent = {"type": "page_id", "page_id": self.pages[parent_key]["id"]}
+        else:
+            parent = {"type": "block_id", "block_id": dashed_id(parent_id)}
+        block = {
+            "object": "block",
+            "id": block_id,
+            "parent": parent,
+            "created_time": spec.get("created_time") or now,
+            "last_edited_time": spec.get("last_edited_time") or now,
+            "has_children": False,
+            "archived": False,
+            "type": b_type,
+            b_type: payload,
+        }
+        key = normalize_id(block_id)
+        self.blocks[key] = block
+        self.children.setdefault(parent_key, []).append(key)
+        self.children.setdefault(key, [])
+        if parent_key in self.blocks:
+            self.blocks[parent_key]["has_children"] = True
+        for child in nested:
+            self._insert_block(block_id, child)
+        return block
+
+    def append_children(self, parent_id, specs, after=None):
+        siblings = self.children.setdefault(normalize_id(parent_id), [])
+        if after and normalize_id(after) not in siblings:
+            raise ApiError(400, "validation_error", f"Block {after} is not a child of {parent_id}.")
+        created = [self._insert_block(parent_id, spec) for spec in specs]
+        if after:
+            # 새 블록들을 after 블록 바로 뒤로 옮김
+            new_keys = siblings[len(siblings) - len(created):]
+            del siblings[len(siblings) - len(created):]
+            index = siblings.index(normalize_id(after)) + 1
+            siblings[index:index] = new_keys
+        return created
+
+    def get_block(self, block_id):
+        block = self.blocks.get(normalize_id(block_id))
+        if block is None or block["archived"]:
+            raise ApiError(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+        return block
+
+    def list_children(self, parent_id):
+        key = normalize_id(parent_id)
+        if key not in self.children:
+            raise ApiError(404, "object_not_found", f"Could not find block with ID: {parent_id}.")
+        return [self.blocks[c] for c in self.children[key] if not self.blocks[c]["archived"]]
+
+    def update_block(self, block_id, payload):
+        block = self.get_block(block_id)
+        b_type = block["type"]
+        for key, value in payload.items():
+            if key == "archived":
+                block["archived"] = bool(value)
+                continue
+            if key != b_type:
+                raise ApiError(400, "validation_error",
+                               f"body.{key} should be not present, instead was `{json.dumps(value)}`.")
+            value = copy.deepcopy(value)
+            if "rich_text" in value:
+                value["rich_text"] = render_rich_text(value["rich_text"])
+            block[b_type].update(value)
+        block["last_edited_time"] = now_iso()
+        self.touch_page(block_id)
+        return block
+
+    def delete_block(self, block_id):
+        block = self.get_block(block_id)
+        block["archived"] = True
+        parent = block["parent"].get("block_id")
+        if parent and not self.list_children(parent):
+            self.blocks[normalize_id(parent)]["has_children"] = False
+        self.touch_page(block_id)
+        return block
+
+    def touch_page(self, block_id):
+        # Notion 처럼 블록이 바뀌면 그 블록이 들어 있는 페이지의 last_edited_time 도 바뀜
+        key = normalize_id(block_id)
+        while key in self.blocks:
+            parent = self.blocks[key]["parent"]
+            key = normalize_id(parent.get("block_id") or parent.get("page_id") or "")
+        if key in self.pages:
+            self.pages[key]["last_edited_time"] = now_iso()
+
+class MockNotionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store, latency=0.0, rate_429=0.0, rate_5xx=0.0, retry_after=1, seed=None):
+        super().__init__(address, MockNotionHandler)
+        self.store = store
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+def _compare(value, condition):
+    if "is_empty" in condition:
+        return value is None
+    if "is_not_empty" in condition:
+        return value is not None
+    if value is None:
+        return False
+    for op, target in condition.items():
+        # 날짜만 있는 값과 시각이 있는 값을 비교할 때는 날짜 부분만 비교
+        if len(target) == 10 or len(value) == 10:
+            value, target = value[:10], target[:10]
+        if op == "equals" and not value == target:
+            return False
+        if op == "before" and not value < target:
+            return False
+        if op == "after" and not value > target:
+            return False
+        if op == "on_or_before" and not value <= target:
+            return False
+        if op == "on_or_after" and not value >= target:
+            return False
+    return True
+
+def _sort_value(page, sort):
+    if "timestamp" in sort:
+        return page[sort["timestamp"]] or ""
+    prop = page["properties"].get(sort.get("property"), {})
+    value = prop.get(prop.get("type"))
+    if isinstance(value, dict):
+        return value.get("start") or ""
+    if isinstance(value, list):
+        return "".join(v.get("plain_text", "") for v in value)
+    return "" if value is None else str(value)
+
+def matches_filter(page, flt):
+    """
+    database query filter 중 스크립트가 쓰는 부분(and/or, timestamp, date 속성)만 평가합니다.
+    """
+    if not flt:
+        return True
+    if "and" in flt:
+        return all(matches_filter(page, f) for f in flt["and"])
+    if "or" in flt:
+        return any(matches_filter(page, f) for f in flt["or"])
+    if "timestamp" in flt:
+        ts = flt["timestamp"]
+        return _compare(page[ts], flt[ts])
+    prop = page["properties"].get(flt.get("property"))
+    if prop is None:
+        raise ApiError(400, "validation_error", f"Could not find property with name or id: {flt.get('property')}")
+    if "date" in flt:
+        value = prop.get("date") if prop["type"] == "date" else {"start": prop.get(prop["type"])}
+        return _compare((value or {}).get("start"), flt["date"])
+    return True
+
+def paginate(items, body):
+    page_size = min(int(body.get("page_size") or 100), 100)
+    start = int(body.get("start_cursor") or 0)
+    chunk = items[start:start + page_size]
+    has_more = start + page_size < len(items)
+    return {
+        "object": "list",
+        "results": chunk,
+        "has_more": has_more,
+        "next_cursor": str(start + page_size) if has_more else None,
+    }
+
+def validate_children(children, depth=0, path="body.children"):
+    # Notion 한도: children 배열은 100개까지, 한 요청 안의 중첩은 2단계까지
+    if len(children) > 100:
+        raise ApiError(400, "validation_error", f"{path}.length should be ≤ `100`, instead was `{len(children)}`.")
+    for i, child in enumerate(children):
+        nested = (child.get(child.get("type"), {}) or {}).get("children") or child.get("children") or []
+        if nested and depth >= 2:
+            raise ApiError(400, "validation_error", f"{path}[{i}] exceeds the maximum nesting depth of 2.")
+        validate_children(nested, depth + 1, f"{path}[{i}].children")
+
+ROUTES = [
+    ("POST", re.compile(r"^/v1/search$"), "search", "/v1/search"),
+    ("POST", re.compile(r"^/v1/databases$"), "create_database", "/v1/databases"),
+    ("GET", re.compile(r"^/v1/databases/([^/]+)$"), "get_database", "/v1/databases/{id}"),
+    ("POST", re.compile(r"^/v1/databases/([^/]+)/query$"), "query_database", "/v1/databases/{id}/query"),
+    ("POST", re.compile(r"^/v1/pages$"), "create_page", "/v1/pages"),
+    ("GET", re.compile(r"^/v1/pages/([^/]+)$"), "get_page", "/v1/pages/{id}"),
+    ("PATCH", re.compile(r"^/v1/pages/([^/]+)$"), "update_page", "/v1/pages/{id}"),
+    ("GET", re.compile(r"^/v1/blocks/([^/]+)/children$"), "list_children", "/v1/blocks/{id}/children"),
+    ("PATCH", re.compile(r"^/v1/blocks/([^/]+)/children$"), "append_children", "/v1/blocks/{id}/children"),
+    ("GET", re.compile(r"^/v1/blocks/([^/]+)$"), "get_block", "/v1/blocks/{id}"),
+    ("PATCH", re.compile(r"^/v1/blocks/([^/]+)$"), "update_block", "/v1/blocks/{id}"),
+    ("DELETE", re.compile(r"^/v1/blocks/([^/]+)$"), "delete_block", "/v1/blocks/{id}"),
+]
+
+class MockNotionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, extra_headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("x-request-id", new_id())
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, code, message, extra_headers=None):
+        self._send_json(status, {"object": "error", "status": status, "code": code,
+                                 "message": message, "request_id": new_id()}, extra_headers)
+
+    def _handle(self, method):
+        parsed = urllib.parse.urlparse(self.path)
+        query = {k: v[-1] for k, v in urllib.parse.parse_qs(parsed.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        server = self.server
+
+        if parsed.path == "/__stats":
+            with server.stats_lock:
+                body = {" ".join(k): v for k, v in server.stats.items()}
+            return self._send_json(200, body)
+        if parsed.path == "/__reset":
+            with server.stats_lock:
+                server.stats.clear()
+            return self._send_json(200, {})
+
+        for r_method, pattern, name, template in ROUTES:
+            match = pattern.match(parsed.path)
+            if r_method == method and match:
+                break
+        else:
+            return self._send_error(400, "invalid_request_url", "Invalid request URL.")
+
+        with server.stats_lock:
+            server.stats[(method, template)] += 1
+            roll_429 = server.random.random() < server.rate_429
+            roll_5xx = server.random.random() < server.rate_5xx
+
+        if server.latency:
+            time.sleep(server.latency)
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            return self._send_error(401, "unauthorized", "API token is invalid.")
+        if roll_429:
+            return self._send_error(429, "rate_limited", "You have been rate limited.",
+                                    {"Retry-After": str(server.retry_after)})
+        if roll_5xx:
+            return self._send_error(503, "service_unavailable", "Notion is unavailable.")
+
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            return self._send_error(400, "invalid_json", "Error parsing JSON body.")
+        body.update(query)
+        if "filter_properties" in query:
+            body["filter_properties"] = urllib.parse.parse_qs(parsed.query)["filter_properties"]
+
+        try:
+            with server.store.lock:
+                result = getattr(self, "route_" + name)(server.store, body, *match.groups())
+        except ApiError as e:
+            return self._send_error(e.status, e.code, e.message)
+        self._send_json(200, result)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    # ---- routes ----
+
+    def route_search(self, store, body):
+        wanted = (body.get("filter") or {}).get("value")
+        text = (body.get("query") or "").lower()
+        results = []
+        if wanted in (None, "database"):
+            for db in store.databases.values():
+                title = "".join(t["plain_text"] for t in db["title"])
+                if not db["archived"] and text in title.lower():
+                    results.append(db)
+        if wanted in (None, "page"):
+            for page in store.pages.values():
+                if page["parent"]["type"] == "workspace" and not page["archived"]:
+                    results.append(page)
+        return paginate(results, body)
+
+    def route_create_database(self, store, body):
+        parent = body.get("parent", {})
+        spec = {
+            "title": body.get("title", []),
+            "icon": body.get("icon"),
+            "parent_page_id": parent.get("page_id"),
+            "properties": body.get("properties", {}),
+        }
+        if spec["parent_page_id"] and normalize_id(spec["parent_page_id"]) not in store.children:
+            raise ApiError(404, "object_not_found", "Could not find page.")
+        return store.add_database(spec)
+
+    def route_get_database(self, store, body, db_id):
+        db = store.databases.get(normalize_id(db_id))
+        if db is None:
+            raise ApiError(404, "object_not_found", f"Could not find database with ID: {db_id}.")
+        return db
+
+    def route_query_database(self, store, body, db_id):
+        pages = store.query_rows(db_id)
+        if body.get("filter"):
+            pages = [p for p in pages if matches_filter(p, body["filter"])]
+        for sort in reversed(body.get("sorts") or []):
+            pages = sorted(pages, key=lambda p: _sort_value(p, sort),
+                           reverse=sort.get("direction") == "descending")
+        result = paginate(pages, body)
+        wanted = body.get("filter_properties")
+        if wanted:
+            result["results"] = [dict(p, properties={name: prop for name, prop in p["properties"].items()
+                                                     if prop["id"] in wanted or name in wanted})
+                                 for p in result["results"]]
+        return result
+
+    def route_get_page(self, store, body, page_id):
+        page = store.pages.get(normalize_id(page_id))
+        if page is None or page["archived"]:
+            raise ApiError(404, "object_not_found", f"Could not find page with ID: {page_id}.")
+        return page
+
+    def route_update_page(self, store, body, page_id):
+        return store.update_page(page_id, body)
+
+    def route_create_page(self, store, body):
+        parent = body.get("parent", {})
+        if "database_id" in parent:
+            return store.add_row(parent["database_id"], body)
+        return store.add_page(body, parent={"type": "page_id", "page_id": dashed_id(parent.get("page_id", ""))})
+
+    def route_list_children(self, store, body, block_id):
+        return paginate(store.list_children(block_id), body)
+
+    def route_append_children(self, store, body, block_id):
+        key = normalize_id(block_id)
+        if key not in store.children:
+            raise ApiError(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+        validate_children(body.get("children", []))
+        created = store.append_children(block_id, body.get("children", []), body.get("after"))
+        store.touch_page(block_id)
+        return {"object": "list", "results": created, "has_more": False, "next_cursor": None}
+
+    def route_get_block(self, store, body, block_id):
+        return store.get_block(block_id)
+
+    def route_update_block(self, store, body, block_id):
+        return store.update_block(block_id, body)
+
+    def route_delete_block(self, store, body, block_id):
+        return store.delete_block(block_id)
+
+def start_server(fixture=None, host="127.0.0.1", port=0, **options):
+    """
+    백그라운드 스레드에서 서버를 띄우고 반환합니다. (port=0 이면 빈 포트 사용)
+    """
+    store = NotionStore()
+    if fixture:
+        if isinstance(fixture, str):
+            with open(fixture, "r", encoding="utf-8") as f:
+                fixture = json.load(f)
+        store.load(fixture)
+    server = MockNotionServer((host, port), store, **options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Notion API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--fixture", default="fixtures/notion_workspace.json")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After seconds sent with 429")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = start_server(args.fixture, args.host, args.port, latency=args.latency,
+                          rate_429=args.rate_429, rate_5xx=args.rate_5xx,
+                          retry_after=args.retry_after, seed=args.seed)
+    print(f"Mock Notion API listening. Set NOTION_API_BASE={server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
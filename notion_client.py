@@ -0,0 +1,352 @@
+import os
+import contextlib
+import contextvars
+import json
+import re
+import threading
+import time
+from concurrent.futures import Future
+import requests
+from requests.adapters import HTTPAdapter
+import rate_limiter
+import notion_metrics
+
+NOTION_VERSION = "2022-06-28"
+DEFAULT_API_BASE = "https://api.notion.com/v1"
+
+# (connect, read) seconds. Notion usually answers well under a second,
+# but database queries on large DBs can take a while.
+DEFAULT_TIMEOUT = (5, 30)
+POOL_SIZE = 10
+
+MAX_RETRIES = int(os.environ.get("NOTION_MAX_RETRIES", 6))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_snapshot = None
+# 블록을 PATCH/DELETE 할 때 블록 ID 집합으로 호출 (page_mirror 가 디스크 사본을 정리)
+write_listeners = []
+# 지금 요청을 보내는 작업 이름 (run_jobs.py 가 설정, 따로 실행했을 때와 비교해 아낀 요청을 셀 때 씀)
+current_job = contextvars.ContextVar("notion_job", default=None)
+
+ID_PATTERN = re.compile(r"[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}")
+
+class NotionAPIError(Exception):
+    def __init__(self, response):
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        self.status = response.status_code
+        self.code = body.get("code", "http_error")
+        self.message = body.get("message", response.text[:200])
+        super().__init__(f"{self.status} {self.code}: {self.message}")
+
+def raise_for_error(response):
+    if response.status_code != 200:
+        raise NotionAPIError(response)
+    return response
+
+def api_base():
+    # NOTION_API_BASE lets every script talk to a different endpoint (e.g. a local stand-in)
+    return os.environ.get("NOTION_API_BASE", DEFAULT_API_BASE).rstrip("/")
+
+def get_session():
+    """
+    프로세스 전체에서 공유하는 keep-alive 세션을 반환합니다.
+    api.notion.com 으로의 TCP+TLS 연결을 재사용합니다.
+    """
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Notion-Version": NOTION_VERSION,
+            "Content-Type": "application/json"
+        })
+        _session = session
+    return _session
+
+def json_response(status, body, url=None):
+    res = requests.Response()
+    res.status_code = status
+    res.url = url
+    res.encoding = "utf-8"
+    res.headers["Content-Type"] = "application/json"
+    res._content = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    return res
+
+def error_response(status, code, message, url=None):
+    """
+    Notion 과 같은 모양의 JSON 에러 객체를 담은 Response 를 만듭니다.
+    네트워크 오류나 JSON 이 아닌 에러 응답도 호출하는 쪽에서 똑같이 다룰 수 있습니다.
+    """
+    return json_response(status, {
+        "object": "error",
+        "status": status,
+        "code": code,
+        "message": message
+    }, url)
+
+def _is_idempotent(method, path):
+    # 블록 append(PATCH .../children)나 페이지/DB 생성은 5xx 후 재시도하면 중복될 수 있음
+    if method in ("GET", "DELETE"):
+        return True
+    if method == "POST":
+        return path.endswith("/query") or path.endswith("/search")
+    if method == "PATCH":
+        return not path.endswith("/children")
+    return False
+
+def _send(method, url, headers, kwargs):
+    try:
+        res = get_session().request(method, url, headers=headers, **kwargs)
+    except requests.exceptions.Timeout as e:
+        return error_response(504, "timeout", str(e), url)
+    except requests.exceptions.RequestException as e:
+        return error_response(503, "network_error", str(e), url)
+
+    if res.status_code >= 400:
+        try:
+            res.json()
+        except ValueError:
+            # Proxies / gateways sometimes answer with HTML
+            return error_response(res.status_code, "http_error", res.text[:200], url)
+    return res
+
+def request(token, method, path, **kwargs):
+    """
+    shared_snapshot() 안에서는 같은 GET 을 한 번만 보내고, 블록을 쓰면 그 블록이 들어 있는 응답을 버립니다.
+    fresh=True 인 GET 은 공유된 응답 대신 항상 Notion 에서 다시 읽습니다.
+    """
+    fresh = kwargs.pop("fresh", False)
+    snapshot = _snapshot
+    if method == "GET" and snapshot is not None:
+        return snapshot.get(token, path, kwargs.get("params"), lambda: _request(token, method, path, **kwargs),
+                            fresh=fresh)
+    if method in ("PATCH", "DELETE"):
+        ids = path_ids(path)
+        if snapshot is not None:
+            snapshot.invalidate(ids)
+        for listener in write_listeners:
+            listener(ids)
+    return _request(token, method, path, **kwargs)
+
+def _request(token, method, path, **kwargs):
+    """
+    레이트 리밋(토큰 버킷)을 지키면서 요청을 보냅니다.
+    429 는 Retry-After 만큼 모든 스레드를 멈추고 재시도하고,
+    5xx / 네트워크 오류는 jitter 지수 백오프로 재시도합니다.
+    """
+    url = path if path.startswith("http") else f"{api_base()}{path}"
+    headers = {"Authorization": f"Bearer {token}"}
+    headers.update(kwargs.pop("headers", {}))
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+
+    limiter = rate_limiter.get_limiter()
+    retry_5xx = _is_idempotent(method, path)
+    attempt = 0
+    started = time.perf_counter()
+    http_time = 0.0
+    while True:
+        limiter.acquire()
+        sent = time.perf_counter()
+        res = _send(method, url, headers, kwargs)
+        http_time += time.perf_counter() - sent
+        status = res.status_code
+        if (status not in RETRY_STATUSES or attempt >= MAX_RETRIES
+                or (status != 429 and not retry_5xx)):
+            _record(method, path, res, http_time, time.perf_counter() - started - http_time, attempt)
+            return res
+
+        retry_after = rate_limiter.parse_retry_after(res.headers.get("Retry-After"))
+        delay = rate_limiter.backoff_delay(attempt, retry_after)
+        if status == 429:
+            limiter.pause(delay)
+        print(f"Notion {status} on {method} {path}, retrying in {delay:.1f}s "
+              f"({attempt + 1}/{MAX_RETRIES})")
+        time.sleep(delay)
+        attempt += 1
+
+def _record(method, path, res, latency, wait, retries):
+    body = res.request.body if res.request is not None else None
+    request_id = res.headers.get("x-request-id") or res.headers.get("x-notion-request-id")
+    if request_id is None and res.status_code >= 400:
+        try:
+            request_id = res.json().get("request_id")
+        except ValueError:
+            pass
+    notion_metrics.record(method, path, res.status_code, len(body or b""), len(res.content or b""),
+                          latency, wait, retries, request_id)
+
+class ResponseSnapshot:
+    """
+    한 프로세스 안에서 여러 작업이 읽는 블록(GET /blocks/...)을 한 번만 가져오도록 응답을 공유합니다.
+    같은 요청이 동시에 들어오면 하나만 보내고 나머지는 그 결과를 기다립니다.
+    블록을 PATCH/DELETE 하면 그 블록의 응답과, 그 블록이 들어 있는 children 목록을 버립니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> Future(Response)
+        self._members = {}  # key -> 응답에 들어 있는 블록 ID
+        self._seeded = set()  # seed() 로 넣은 Future
+        self.hits = 0  # 이미 보냈거나 보내는 중인 요청의 응답을 나눠 받은 횟수
+        self.saved = 0  # 그중 작업을 따로 실행했다면 보냈을 요청 (다른 작업의 응답이거나, 작업이 스스로 공유하지 않음)
+        self.mirror_hits = 0  # seed() 로 넣은 응답(페이지 사본)을 쓴 횟수
+        self.sent = 0
+        self.sharing_jobs = set()  # 따로 실행해도 자기 shared_snapshot() 을 여는 작업
+
+    @staticmethod
+    def key(token, path, params):
+        params = dict(params or {})
+        if path.endswith("/children"):
+            # Notion 의 기본 page_size 가 100 이므로 생략한 요청과 같은 응답
+            params.setdefault("page_size", 100)
+        return token, path.replace("-", ""), tuple(sorted(params.items()))
+
+    def get(self, token, path, params, fetch, fresh=False):
+        key = self.key(token, path, params)
+        job = current_job.get()
+        saved = False
+        with self._lock:
+            future = None if fresh else self._entries.get(key)
+            owner = future is None
+            if owner:
+                future = self._entries[key] = Future()
+                future.jobs = {job}
+                self.sent += 1
+            elif future in self._seeded:
+                self.mirror_hits += 1
+            else:
+                self.hits += 1
+                saved = job not in future.jobs or job not in self.sharing_jobs
+                future.jobs.add(job)
+                self.saved += saved
+        if not owner:
+            if future in self._seeded:
+                notion_metrics.increment("page_mirror_hits")
+            elif saved:
+                notion_metrics.increment("requests_saved")
+            return future.result()
+
+        try:
+            res = fetch()
+        except BaseException as e:
+            with self._lock:
+                if self._entries.get(key) is future:
+                    del self._entries[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if self._entries.get(key) is future:
+                if res.status_code == 200:
+                    self._members[key] = self._block_ids(res)
+                else:
+                    del self._entries[key]
+        future.set_result(res)
+        return res
+
+    def seed(self, token, path, params, body):
+        """
+        이미 알고 있는 응답(로컬 사본 등)을 넣어 둡니다. 같은 요청이 있으면 그대로 둡니다.
+        """
+        key = self.key(token, path, params)
+        res = json_response(200, body, path)
+        with self._lock:
+            if key not in self._entries:
+                future = self._entries[key] = Future()
+                future.set_result(res)
+                self._members[key] = self._block_ids(res)
+                self._seeded.add(future)
+
+    @staticmethod
+    def _block_ids(res):
+        try:
+            data = res.json()
+        except ValueError:
+            return set()
+        items = data.get("results", []) if data.get("object") == "list" else [data]
+        return {(item.get("id") or "").replace("-", "") for item in items}
+
+    def invalidate(self, ids):
+        if not ids:
+            return
+        with self._lock:
+            stale = [key for key in self._entries
+                     if any(i in key[1] for i in ids) or ids & self._members.get(key, set())]
+            for key in stale:
+                del self._entries[key]
+                self._members.pop(key, None)
+
+def job_initializer():
+    """
+    ThreadPoolExecutor(initializer=...) 에 넘겨서, 풀을 만든 작업의 이름(current_job)을 작업 스레드에 물려줍니다.
+    """
+    job = current_job.get()
+    return lambda: current_job.set(job)
+
+def path_ids(path):
+    return {match.replace("-", "") for match in ID_PATTERN.findall(path)}
+
+def active_snapshot():
+    """
+    지금 켜져 있는 ResponseSnapshot (shared_snapshot() 밖이면 None).
+    """
+    return _snapshot
+
+@contextlib.contextmanager
+def shared_snapshot():
+    """
+    이 블록 안에서 보내는 GET 을 ResponseSnapshot 으로 공유합니다. 이미 켜져 있으면 그걸 그대로 씁니다.
+    """
+    global _snapshot
+    previous = _snapshot
+    snapshot = _snapshot = previous or ResponseSnapshot()
+    if previous is not None:
+        # 이 작업은 따로 실행해도 같은 GET 을 한 번만 보내므로, 작업 안의 재사용은 아낀 요청이 아님
+        snapshot.sharing_jobs.add(current_job.get())
+    try:
+        yield snapshot
+    finally:
+        _snapshot = previous
+
+def get(token, path, **kwargs):
+    return request(token, "GET", path, **kwargs)
+
+def post(token, path, payload=None, **kwargs):
+    return request(token, "POST", path, json=payload, **kwargs)
+
+def patch(token, path, payload=None, **kwargs):
+    return request(token, "PATCH", path, json=payload, **kwargs)
+
+def delete(token, path, **kwargs):
+    return request(token, "DELETE", path, **kwargs)
+
+def connection_stats():
+    """
+    이번 실행에서 보낸 요청 수와 새로 연 연결 / 재사용한 연결 수를 반환합니다.
+    """
+    stats = {"requests": 0, "opened": 0, "reused": 0}
+    if _session is None:
+        return stats
+
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            stats["requests"] += pool.num_requests
+            stats["opened"] += pool.num_connections
+    stats["reused"] = max(stats["requests"] - stats["opened"], 0)
+    return stats
+
+def print_connection_stats():
+    stats = connection_stats()
+    print(f"Notion HTTP: {stats['requests']} requests, "
+          f"{stats['opened']} connections opened, {stats['reused']} reused.")
@@ -0,0 +1,198 @@
+import atexit
+import datetime
+import json
+import os
+import re
+import threading
+
+# 초 단위 히스토그램 버킷 (Prometheus 기본값과 비슷하게)
+BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+ID_PATTERN = re.compile(r"/[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}(?=/|$)")
+
+_records = []
+_counters = {}
+_lock = threading.Lock()
+_job = None
+
+def endpoint_template(path):
+    """
+    /blocks/2f30d907.../children -> /blocks/{id}/children
+    """
+    path = path.split("?")[0]
+    if path.startswith("http"):
+        path = "/" + path.split("/", 3)[3]
+        if path.startswith("/v1/"):
+            path = path[3:]
+    return ID_PATTERN.sub("/{id}", path)
+
+def record(method, path, status, bytes_out, bytes_in, latency, wait, retries, request_id=None):
+    """
+    latency 는 실제 HTTP 왕복 시간(재시도 포함), wait 는 레이트 리밋 / 백오프로 기다린 시간입니다.
+    """
+    with _lock:
+        _records.append({
+            "endpoint": endpoint_template(path),
+            "method": method,
+            "status": status,
+            "bytes_out": bytes_out,
+            "bytes_in": bytes_in,
+            "latency": latency,
+            "wait": wait,
+            "retries": retries,
+            "request_id": request_id,
+        })
+
+def increment(name, amount=1):
+    """
+    요청과 무관한 이벤트 카운터 (예: 내용이 같아서 건너뛴 PATCH 수).
+    """
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summary(job=None):
+    """
+    엔드포인트별 요청 수, 상태 코드, 바이트, 재시도, 지연 히스토그램을 모아서 반환합니다.
+    """
+    with _lock:
+        records = list(_records)
+        counters = dict(_counters)
+
+    endpoints = {}
+    for rec in records:
+        key = f"{rec['method']} {rec['endpoint']}"
+        ep = endpoints.setdefault(key, {
+            "method": rec["method"], "endpoint": rec["endpoint"], "count": 0, "status": {},
+            "bytes_out": 0, "bytes_in": 0, "retries": 0, "latency_sum": 0.0, "wait_sum": 0.0,
+            "buckets": [0] * (len(BUCKETS) + 1), "latencies": []
+        })
+        ep["count"] += 1
+        ep["status"][str(rec["status"])] = ep["status"].get(str(rec["status"]), 0) + 1
+        ep["bytes_out"] += rec["bytes_out"]
+        ep["bytes_in"] += rec["bytes_in"]
+        ep["retries"] += rec["retries"]
+        ep["latency_sum"] += rec["latency"]
+        ep["wait_sum"] += rec["wait"]
+        ep["latencies"].append(rec["latency"])
+        for i, bound in enumerate(BUCKETS):
+            if rec["latency"] <= bound:
+                ep["buckets"][i] += 1
+                break
+        else:
+            ep["buckets"][-1] += 1
+
+    for ep in endpoints.values():
+        latencies = ep.pop("latencies")
+        ep["latency_p50"] = _percentile(latencies, 50)
+        ep["latency_p95"] = _percentile(latencies, 95)
+
+    slowest = sorted(records, key=lambda r: r["latency"], reverse=True)[:5]
+    return {
+        "job": job,
+        "finished": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "total_requests": len(records),
+        "total_retries": sum(r["retries"] for r in records),
+        "total_wait": sum(r["wait"] for r in records),
+        "bytes_out": sum(r["bytes_out"] for r in records),
+        "bytes_in": sum(r["bytes_in"] for r in records),
+        "buckets": BUCKETS,
+        "endpoints": endpoints,
+        "counters": counters,
+        "slowest": slowest,
+    }
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+def prometheus_text(data):
+    job = _label(data["job"] or "notion")
+    lines = [
+        "# HELP notion_request_duration_seconds Notion API round-trip time (sum over retries).",
+        "# TYPE notion_request_duration_seconds histogram",
+    ]
+    for ep in data["endpoints"].values():
+        labels = f'job="{job}",method="{ep["method"]}",endpoint="{_label(ep["endpoint"])}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ["+Inf"], ep["buckets"]):
+            cumulative += count
+            lines.append(f'notion_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"notion_request_duration_seconds_sum{{{labels}}} {ep['latency_sum']:.6f}")
+        lines.append(f"notion_request_duration_seconds_count{{{labels}}} {ep['count']}")
+
+    lines += ["# HELP notion_requests_total Notion API requests by final status.",
+              "# TYPE notion_requests_total counter"]
+    for ep in data["endpoints"].values():
+        for status, count in sorted(ep["status"].items()):
+            lines.append(f'notion_requests_total{{job="{job}",method="{ep["method"]}",'
+                         f'endpoint="{_label(ep["endpoint"])}",status="{status}"}} {count}')
+
+    lines += ["# HELP notion_request_retries_total Retries after 429/5xx.",
+              "# TYPE notion_request_retries_total counter"]
+    for ep in data["endpoints"].values():
+        lines.append(f'notion_request_retries_total{{job="{job}",method="{ep["method"]}",'
+                     f'endpoint="{_label(ep["endpoint"])}"}} {ep["retries"]}')
+
+    lines += ["# HELP notion_request_wait_seconds_total Time spent waiting on the rate limiter and backoff.",
+              "# TYPE notion_request_wait_seconds_total counter"]
+    for ep in data["endpoints"].values():
+        lines.append(f'notion_request_wait_seconds_total{{job="{job}",method="{ep["method"]}",'
+                     f'endpoint="{_label(ep["endpoint"])}"}} {ep["wait_sum"]:.6f}')
+
+    lines += ["# HELP notion_events_total Client-side events such as skipped no-op writes.",
+              "# TYPE notion_events_total counter"]
+    for name, count in sorted(data.get("counters", {}).items()):
+        lines.append(f'notion_events_total{{job="{job}",event="{_label(name)}"}} {count}')
+
+    lines += ["# HELP notion_request_bytes_total Request/response body bytes.",
+              "# TYPE notion_request_bytes_total counter",
+              f'notion_request_bytes_total{{job="{job}",direction="out"}} {data["bytes_out"]}',
+              f'notion_request_bytes_total{{job="{job}",direction="in"}} {data["bytes_in"]}',
+              "# HELP notion_run_finished_timestamp_seconds When the run finished.",
+              "# TYPE notion_run_finished_timestamp_seconds gauge",
+              f'notion_run_finished_timestamp_seconds{{job="{job}"}} '
+              f'{datetime.datetime.fromisoformat(data["finished"]).timestamp():.0f}']
+    return "\n".join(lines) + "\n"
+
+def _write_atomic(path, text):
+    # node_exporter 가 반쯤 쓰인 파일을 읽지 않도록 rename 으로 교체합니다.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def emit_summary(job=None):
+    """
+    실행 요약을 출력합니다.
+    NOTION_METRICS_FILE 이 있으면 JSON 으로, NOTION_METRICS_PROM 이 있으면
+    node_exporter textfile 형식으로도 저장합니다.
+    """
+    import notion_client
+
+    data = summary(job or _job)
+    data["connections"] = notion_client.connection_stats()
+    notion_client.print_connection_stats()
+    print("NOTION_METRICS " + json.dumps(data, ensure_ascii=False, sort_keys=True))
+
+    json_path = os.environ.get("NOTION_METRICS_FILE")
+    if json_path:
+        _write_atomic(json_path, json.dumps(data, ensure_ascii=False, indent=2))
+    prom_path = os.environ.get("NOTION_METRICS_PROM")
+    if prom_path:
+        _write_atomic(prom_path, prometheus_text(data))
+    return data
+
+def start_run(job):
+    """
+    작업 이름을 정하고, 프로세스가 끝날 때(중간 return 포함) 요약을 내보내도록 등록합니다.
+    """
+    global _job
+    if _job is None:
+        atexit.register(emit_summary)
+    _job = job
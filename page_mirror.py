@@ -0,0 +1,170 @@
+"""
+페이지 블록 트리의 로컬 사본 (.notion_cache/page_mirror.json).
+
+children 목록마다 읽은 시각을 기억해 두고, 다음 실행에서는 페이지의 last_edited_time 이
+그대로면 API 를 걷지 않고 사본을 씁니다. 페이지가 바뀌었으면 최상위 children 부터 다시 읽되,
+last_edited_time 과 has_children 이 그대로인 블록의 하위 트리는 사본을 재사용합니다.
+깊은 곳의 수정이 부모 블록의 last_edited_time 에 반영되지 않는 경우가 있어서
+PAGE_MIRROR_RECONCILE_HOURS(기본 24) 마다 트리 전체를 다시 읽습니다.
+
+warm() 은 사본을 지금 켜져 있는 notion_client 공유 스냅샷에 넣어 두므로, 기존 코드의
+GET /blocks/{id}/children 이 그대로 로컬 트리에서 응답을 받습니다. 스냅샷은 켜지 않으니
+전체 스캔이나 reconcile 이 필요할 때만 mirrored() 블록 안에서 부르세요.
+설정처럼 값을 읽어 가는 목록은 fetch_all_children(..., fresh=True) 로 항상 Notion 에서 읽어야 합니다.
+블록을 PATCH/DELETE 하면 그 블록이 들어 있는 목록은 사본에서도 지웁니다.
+"""
+import contextlib
+import datetime
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import notion_client
+import local_cache
+from block_walker import DEFAULT_CONCURRENCY, fetch_all_children
+
+MIRROR_FILE = "page_mirror.json"
+RECONCILE_INTERVAL = datetime.timedelta(hours=float(os.environ.get("PAGE_MIRROR_RECONCILE_HOURS", 24)))
+
+_lock = threading.Lock()
+_warmed = {}  # 이번 실행에서 이미 맞춰 본 페이지 -> children 목록
+
+def _utcnow():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def _key(object_id):
+    return (object_id or "").replace("-", "")
+
+def _parse_time(value):
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def _is_fresh(edited, fetched):
+    # last_edited_time 은 분 단위로 잘리므로, 같은 분 안에 읽은 목록은 그 뒤의 수정을 놓쳤을 수 있음
+    if not edited or not fetched:
+        return False
+    return _parse_time(fetched) - _parse_time(edited) >= datetime.timedelta(minutes=1)
+
+def _fetch_level(token, parent_ids):
+    with ThreadPoolExecutor(max_workers=min(DEFAULT_CONCURRENCY, len(parent_ids)),
+                            initializer=notion_client.job_initializer()) as pool:
+        return list(pool.map(lambda parent_id: fetch_all_children(token, parent_id), parent_ids))
+
+def sync(token, page_id, full=False):
+    """
+    사본을 Notion 과 맞추고 {부모 블록 ID: {"fetched", "results"}} 를 반환합니다.
+    """
+    mirror = local_cache.load_json(MIRROR_FILE, {})
+    state = mirror.get(_key(page_id), {})
+    old = state.get("children", {})
+    last_reconcile = state.get("last_reconcile")
+    reconcile = (full or not old or not last_reconcile
+                 or _utcnow() - datetime.datetime.fromisoformat(last_reconcile) >= RECONCILE_INTERVAL)
+
+    res = notion_client.get(token, f"/pages/{page_id}")
+    notion_client.raise_for_error(res)
+    edited = res.json().get("last_edited_time")
+    if not reconcile and edited == state.get("last_edited_time") and _is_fresh(edited, state.get("fetched")):
+        print(f"Page mirror: unchanged, {len(old)} lists from local copy.")
+        return old
+
+    started = _utcnow().isoformat()
+    previous = {_key(b.get("id")): b for listing in old.values() for b in listing["results"]}
+    children = {}
+    fetched = 0
+
+    def reuse(block_id):
+        # 바뀌지 않은 블록의 하위 목록을 옮기고, 사본에 없는 목록(쓰기로 지워진 것)은 새로 읽을 목록으로 반환
+        listing = old.get(block_id)
+        if listing is None:
+            return [block_id]
+        children[block_id] = listing
+        missing = []
+        for child in listing["results"]:
+            if child.get("has_children"):
+                missing += reuse(_key(child.get("id")))
+        return missing
+
+    level = [_key(page_id)]
+    while level:
+        next_level = []
+        for parent_id, blocks in zip(level, _fetch_level(token, level)):
+            fetched += 1
+            children[parent_id] = {"fetched": started, "results": blocks}
+            for block in blocks:
+                block_id = _key(block.get("id"))
+                if not block.get("has_children") or block_id in children:
+                    continue
+                before = previous.get(block_id)
+                unchanged = (not reconcile and before is not None and block_id in old
+                             and before.get("last_edited_time") == block.get("last_edited_time")
+                             and before.get("has_children") == block.get("has_children")
+                             and _is_fresh(block.get("last_edited_time"), old[block_id].get("fetched")))
+                if unchanged:
+                    next_level += reuse(block_id)
+                else:
+                    next_level.append(block_id)
+        level = [block_id for block_id in dict.fromkeys(next_level) if block_id not in children]
+
+    mirror[_key(page_id)] = {
+        "last_edited_time": edited,
+        "fetched": started,
+        "last_reconcile": started if reconcile else last_reconcile,
+        "children": children,
+    }
+    local_cache.save_json(MIRROR_FILE, mirror)
+    mode = "full reconcile" if reconcile else "revalidated"
+    print(f"Page mirror: {fetched} lists fetched, {len(children) - fetched} reused ({mode}).")
+    return children
+
+def _drop(listings, block_ids):
+    stale = [parent_id for parent_id, listing in listings.items()
+             if parent_id in block_ids or any(_key(b.get("id")) in block_ids for b in listing["results"])]
+    for parent_id in stale:
+        del listings[parent_id]
+    return bool(stale)
+
+def forget(block_ids):
+    """
+    블록을 쓴 뒤 호출됩니다. 그 블록의 children 목록과 그 블록이 들어 있는 목록을 사본에서 지웁니다.
+    """
+    with _lock:
+        mirror = local_cache.load_json(MIRROR_FILE, {})
+        changed = False
+        for state in mirror.values():
+            changed = _drop(state.get("children", {}), block_ids) or changed
+        if changed:
+            local_cache.save_json(MIRROR_FILE, mirror)
+        for listings in _warmed.values():
+            _drop(listings, block_ids)
+
+def warm(token, page_id):
+    """
+    사본을 맞춘 뒤 켜져 있는 공유 스냅샷에 넣어서, 이번 실행의 children 조회가 로컬 트리에서 응답을 받게 합니다.
+    같은 프로세스에서 여러 번 불러도 한 번만 맞춥니다. 실패하면 평소처럼 API 를 씁니다.
+    """
+    snapshot = notion_client.active_snapshot()
+    with _lock:
+        children = _warmed.get(_key(page_id))
+        if children is None:
+            try:
+                children = sync(token, page_id, full=os.environ.get("PAGE_MIRROR_FULL_SYNC") == "1")
+            except notion_client.NotionAPIError as e:
+                print(f"Page mirror unavailable: {e}")
+                return None
+            _warmed[_key(page_id)] = children
+        if snapshot is not None:
+            for parent_id, listing in children.items():
+                snapshot.seed(token, f"/blocks/{parent_id}/children", {"page_size": 100}, {
+                    "object": "list", "results": listing["results"], "has_more": False, "next_cursor": None
+                })
+    return children
+
+@contextlib.contextmanager
+def mirrored(token, page_id):
+    """
+    이 블록 안에서는 GET 을 공유 스냅샷으로 보내고, 페이지 children 조회는 사본에서 응답을 받습니다.
+    """
+    with notion_client.shared_snapshot() as snapshot:
+        warm(token, page_id)
+        yield snapshot
+
+notion_client.write_listeners.append(forget)
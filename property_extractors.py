@@ -0,0 +1,112 @@
+"""
+데이터베이스 스키마(속성 이름 -> 타입)를 한 번 보고 행(page)에서 값을 꺼내는 함수를 만들어 둡니다.
+행마다 properties 를 훑어서 날짜/제목 속성을 찾지 않아도 됩니다.
+"""
+import hashlib
+import json
+
+def _plain_text(items):
+    return "".join(t.get("plain_text", "") for t in items or [])
+
+def _option_name(value):
+    return value.get("name") if value else None
+
+def _date_start(value):
+    return value.get("start") if value else None
+
+# 속성 타입 -> (page["properties"][name][type] 값 -> 파이썬 값)
+VALUE_EXTRACTORS = {
+    "title": _plain_text,
+    "rich_text": _plain_text,
+    "date": _date_start,
+    "created_time": lambda value: value,
+    "last_edited_time": lambda value: value,
+    "number": lambda value: value,
+    "checkbox": bool,
+    "select": _option_name,
+    "status": _option_name,
+    "multi_select": lambda value: [o.get("name") for o in value or []],
+}
+
+# 날짜로 쓸 수 있는 속성 타입, 우선순위 순 (created_time 속성 값은 페이지 created_time 과 같음)
+DATE_TYPES = ("date", "created_time")
+
+# 날짜 속성이 여러 개일 때 먼저 고르는 이름
+PREFERRED_DATE_NAMES = ["날짜", "Date", "date"]
+
+def schema_hash(schema):
+    return hashlib.sha1(json.dumps(schema, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def schema_from_page(page):
+    return {name: prop.get("type") for name, prop in page.get("properties", {}).items()}
+
+def pick_property(schema, types, configured=None, preferred=()):
+    """
+    configured(설정된 이름)가 있으면 그것을 고릅니다. 없으면 types 의 순서대로 그 타입의 속성 중에서
+    preferred 순서, 그다음 이름순으로 첫 번째 속성을 고릅니다 (date 속성이 있으면 created_time 보다 먼저).
+    dict 순서에 따라 결과가 달라지지 않습니다.
+
+    >>> pick_property({"Visit day": "date", "Created": "created_time"}, DATE_TYPES, preferred=PREFERRED_DATE_NAMES)
+    'Visit day'
+    >>> pick_property({"Created": "created_time"}, DATE_TYPES, preferred=PREFERRED_DATE_NAMES)
+    'Created'
+    """
+    if configured:
+        if schema.get(configured) in types:
+            return configured
+        print(f"Property '{configured}' is not one of {types} in the schema. Falling back.")
+    for prop_type in types:
+        candidates = sorted(name for name, t in schema.items() if t == prop_type)
+        for name in preferred:
+            if name in candidates:
+                return name
+        if candidates:
+            return candidates[0]
+    return None
+
+def make_getter(name, prop_type):
+    convert = VALUE_EXTRACTORS[prop_type]
+
+    def get(page):
+        prop = page.get("properties", {}).get(name)
+        if prop is None:
+            return None
+        return convert(prop.get(prop_type))
+    return get
+
+class CompiledSchema:
+    """
+    스키마 하나에 대해 미리 만든 getter 모음.
+    date(page) 는 날짜 속성이 비어 있으면 페이지 created_time 을 씁니다.
+    """
+
+    def __init__(self, schema, date_property=None, title_property=None):
+        self.schema = dict(schema)
+        self.date_property = pick_property(schema, DATE_TYPES, date_property, PREFERRED_DATE_NAMES)
+        self.title_property = pick_property(schema, ("title",), title_property)
+        self.getters = {name: make_getter(name, prop_type)
+                        for name, prop_type in schema.items() if prop_type in VALUE_EXTRACTORS}
+        self._date = self.getters.get(self.date_property)
+        self._title = self.getters.get(self.title_property)
+
+    def date(self, page):
+        value = self._date(page) if self._date else None
+        return value or page.get("created_time")
+
+    def title(self, page):
+        return self._title(page) if self._title else None
+
+    def values(self, page):
+        return {name: get(page) for name, get in self.getters.items()}
+
+_compiled = {}
+
+def compile_schema(schema, date_property=None, title_property=None):
+    """
+    스키마 해시(+ 설정된 속성 이름)별로 CompiledSchema 를 캐시해서 반환합니다.
+    """
+    key = (schema_hash(schema), date_property, title_property)
+    compiled = _compiled.get(key)
+    if compiled is None:
+        compiled = _compiled[key] = CompiledSchema(schema, date_property, title_property)
+    return compiled
@@ -0,0 +1,83 @@
+import os
+import random
+import threading
+import time
+
+# Notion 은 통합(integration)당 평균 초당 3회 정도의 요청을 허용합니다.
+DEFAULT_RATE = 3.0
+DEFAULT_BURST = 3
+
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+
+class TokenBucket:
+    """
+    스레드 안전한 토큰 버킷. acquire() 는 토큰이 생길 때까지 대기합니다.
+    429 를 받으면 pause() 로 버킷 전체를 멈춰서 다른 스레드도 같이 쉬게 합니다.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self.lock:
+            until = time.monotonic() + seconds
+            if until > self.blocked_until:
+                self.blocked_until = until
+            # 재개 직후 몰려서 다시 429 를 맞지 않도록 버킷을 비웁니다.
+            self.tokens = 0.0
+            self.updated = until
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    재시도 대기 시간(초). Retry-After 가 있으면 그 값을 따르고,
+    없으면 jitter 를 섞은 지수 백오프(full jitter)를 사용합니다.
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, BACKOFF_BASE)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_limiter():
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            rate = float(os.environ.get("NOTION_RATE_LIMIT", DEFAULT_RATE))
+            burst = int(os.environ.get("NOTION_RATE_BURST", DEFAULT_BURST))
+            _limiter = TokenBucket(rate, burst)
+    return _limiter
@@ -1,19 +1,38 @@
 import os
 import sys
 from datetime import datetime, timedelta, timezone
-import requests
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+import notion_client
+import notion_metrics
+import block_walker
+import block_reconciler
+import block_writer
+import page_mirror
+import widget_registry
+import workspace_catalog
+
+# Force UTF-8 for stdout/stderr so logs redirected on Windows (update.log) stay readable
+sys.stdout.reconfigure(encoding='utf-8')
+sys.stderr.reconfigure(encoding='utf-8')
 
 KST = timezone(timedelta(hours=9))
 
-def calculate_age(birth_date_str):
+# 대상 블록 시그니처: 블록 텍스트(수식 포함)에 하나라도 있으면 해당 블록으로 봅니다.
+# Age Block: "D+" 혹은 LaTeX 구조(\huge)가 포함된 수식
+AGE_SIGNATURE = ["D+", "\\huge"]
+# Season Block: "함께하는" or "함께한"
+SEASON_SIGNATURE = ["함께하는", "함께한"]
+
+def calculate_age(birth_date_str, today=None):
     """
     생년월일(YYYY-MM-DD)을 입력받아 현재 나이를 'X년 X개월 X일차' 형식으로 반환합니다.
+    today 를 주면 그 날짜 기준으로 계산합니다 (여러 반려동물을 같은 기준일로 계산할 때).
     """
     birth_date = datetime.strptime(birth_date_str, "%Y-%m-%d").replace(tzinfo=KST)
     # Use KST
-    today = datetime.now(KST)
+    today = today or datetime.now(KST)
     
     years = today.year - birth_date.year
     months = today.month - birth_date.month
@@ -50,33 +69,28 @@ def get_age_rich_text(years, months, days, total_days):
         "equation": {"expression": equation_content}
     }]
 
-def get_season_rich_text(birth_date, pet_name):
+def season_of(today):
+    """
+    오늘의 계절 (이름, 이모티콘, 계절이 시작된 해). 겨울(12~2월)은 12월이 속한 해를 씁니다.
+    """
+    month = today.month
+    if 3 <= month <= 5:
+        return "봄", "🌷", today.year
+    if 6 <= month <= 8:
+        return "여름", "🍉", today.year
+    if 9 <= month <= 11:
+        return "가을", "🪵", today.year
+    return "겨울", "🧦", today.year if month == 12 else today.year - 1
+
+def get_season_rich_text(birth_date, pet_name, today=None):
     """
     [LINE 3] 계절 정보 + 이모티콘
     디자인: \color{gray} \textsf{\scriptsize 우유와 함께하는 13번째} \color{black} \mathbf{\scriptsize \ 겨울}
     """
-    current_year = datetime.now(KST).year
-    current_month = datetime.now(KST).month
-    birth_year = birth_date.year
+    season_name, season_emoji, season_year = season_of(today or datetime.now(KST))
     
-    # 계절 판별 및 N번째 계산
-    if 3 <= current_month <= 5:
-        season_name = "봄"
-        season_emoji = "🌷"
-        nth_season = current_year - birth_year + 1
-    elif 6 <= current_month <= 8:
-        season_name = "여름"
-        season_emoji = "🍉"
-        nth_season = current_year - birth_year + 1
-    elif 9 <= current_month <= 11:
-        season_name = "가을"
-        season_emoji = "🪵"
-        nth_season = current_year - birth_year + 1
-    else:
-        season_name = "겨울"
-        season_emoji = "🧦"
-        season_year = current_year if current_month == 12 else (current_year - 1)
-        nth_season = season_year - birth_year + 1
+    # N번째 계절
+    nth_season = season_year - birth_date.year + 1
         
     equation_content = (
         f"\\color{{gray}} \\textsf{{\\scriptsize {pet_name}와 함께하는 {nth_season}번째}} \\color{{black}} \\mathbf{{\\scriptsize \\ {season_name}}}"
@@ -93,144 +107,116 @@ def get_season_rich_text(birth_date, pet_name):
         }
     ]
 
+def pet_widgets(pets, today=None):
+    """
+    모든 반려동물의 나이/D+/계절 rich_text 를 같은 기준일로 한 번에 계산합니다.
+    pets: [{"page_id", "pet_name", "birthday"}] — 생일이 잘못된 항목은 건너뜁니다.
+    """
+    today = today or datetime.now(KST)
+    widgets = []
+    for pet in pets:
+        try:
+            years, months, days, total_days = calculate_age(pet["birthday"], today)
+            birth_date = datetime.strptime(pet["birthday"], "%Y-%m-%d")
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Date Error ({pet.get('pet_name')}): {e}")
+            continue
+        widgets.append(dict(pet, age=get_age_rich_text(years, months, days, total_days),
+                            season=get_season_rich_text(birth_date, pet["pet_name"], today)))
+    return widgets
+
 def scan_page_for_targets(token, page_id):
     """
     페이지 전체를 스캔하여 대상 블록(나이, 계절)을 찾습니다.
+    레벨 단위로 병렬 탐색하고, 두 블록을 모두 찾으면 바로 멈춥니다.
     """
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28"
-    }
-    
     found_blocks = {"age": {"id": None, "type": None}, "season": {"id": None, "type": None}}
+    # "block" 에 스캔한 블록을 그대로 두어서, 쓰기 전에 현재 내용과 비교할 수 있게 합니다.
     
-    # BFS 방식으로 탐색 (Queue)
-    queue = [page_id] # 시작은 페이지 아이디
-    visited = set()
-    
-    while queue:
-        current_id = queue.pop(0)
-        if current_id in visited:
-            continue
-        visited.add(current_id)
+    def visit(block, depth):
+        b_type = block.get("type")
+        b_id = block.get("id")
         
-        # 자식 블록 가져오기
-        url = f"https://api.notion.com/v1/blocks/{current_id}/children"
-        try:
-            response = requests.get(url, headers=headers)
-            if response.status_code != 200:
-                continue
-            
-            blocks = response.json().get("results", [])
-            
-            for block in blocks:
-                b_type = block.get("type")
-                b_id = block.get("id")
-                
-                # 내용 검사 (수식 포함 여부 확인)
-                content_str = ""
-                full_content = ""
-                if b_type in ["paragraph", "heading_1", "heading_2", "heading_3", "callout", "quote", "toggle"]:
-                    rich_text = block.get(b_type, {}).get("rich_text", [])
-                    # Plain text 추출
-                    plain_text = "".join([t.get("plain_text", "") for t in rich_text])
-                    # Equation expression 추출 (수식 내부 텍스트 확인용)
-                    equation_text = ""
-                    for rt in rich_text:
-                        if rt.get("type") == "equation":
-                            equation_text += rt.get("equation", {}).get("expression", "")
-                    
-                    full_content = plain_text + equation_text
-                    
-                    # 시그니처 매칭
-                    # Age Block: "D+" 혹은 "해", "개월" 등이 포함된 수식
-                    # Also check for LaTeX structure if text is messed up
-                    if ("D+" in full_content or "\\huge" in full_content) and found_blocks["age"]["id"] is None:
-                        print(f"Found Age Block: {b_id} ({b_type})")
-                        found_blocks["age"] = {"id": b_id, "type": b_type}
-                        
-                    # Season Block: "함께하는" or "함께한"
-                    if ("함께하는" in full_content or "함께한" in full_content) and found_blocks["season"]["id"] is None:
-                        print(f"Found Season Block: {b_id} ({b_type})")
-                        found_blocks["season"] = {"id": b_id, "type": b_type}
-                
-                # 더 깊이 탐색할 블록들 큐에 추가
-                if block.get("has_children"):
-                    queue.append(b_id)
-                    
-            if found_blocks["age"]["id"] and found_blocks["season"]["id"]:
-                break
-                
-        except Exception as e:
-            print(f"Error scanning block {current_id}: {e}")
-            continue
+        # 시그니처 매칭
+        if found_blocks["age"]["id"] is None and widget_registry.matches_signature(block, AGE_SIGNATURE):
+            print(f"Found Age Block: {b_id} ({b_type})")
+            found_blocks["age"] = {"id": b_id, "type": b_type, "block": block}
             
+        if found_blocks["season"]["id"] is None and widget_registry.matches_signature(block, SEASON_SIGNATURE):
+            print(f"Found Season Block: {b_id} ({b_type})")
+            found_blocks["season"] = {"id": b_id, "type": b_type, "block": block}
+        
+        return found_blocks["age"]["id"] and found_blocks["season"]["id"]
+    
+    block_walker.walk_blocks(token, page_id, visit)
     return found_blocks
 
-def update_notion_block_content(token, block_id, rich_text_list, block_type="paragraph"):
+def find_targets(token, page_id):
     """
-    특정 블록의 내용을 업데이트합니다.
+    저장해 둔 대상 블록이 그대로면 그걸 쓰고, 삭제되었거나 시그니처가 바뀌었으면 전체 스캔합니다.
     """
-    url = f"https://api.notion.com/v1/blocks/{block_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
+    registry = widget_registry.load_registry()
+    cached = widget_registry.validate_targets(token, registry, page_id, ["age", "season"])
+    if cached:
+        print("Using registered target blocks.")
+        return {name: {"id": block["id"], "type": block["type"], "block": block} for name, block in cached.items()}
     
-    # 블록 타입에 맞춰 페이로드 생성
-    if block_type == "callout":
-         payload = { "callout": { "rich_text": rich_text_list } }
-    else:
-         # 기본적으로 paragraph로 취급
-         payload = { "paragraph": { "rich_text": rich_text_list } }
-
-    response = requests.patch(url, headers=headers, json=payload)
-    if response.status_code == 200:
-        return True
-    else:
-        print(f"Update failed for {block_id}: {response.text}")
-        return False
-
-def get_config_from_notion(token, page_id):
+    print("Scanning page for target blocks (Smart Find)...")
+    # 스캔할 때만 페이지 사본을 맞춰서, 바뀌지 않은 하위 트리는 로컬에서 읽습니다.
+    page_mirror.warm(token, page_id)
+    targets = scan_page_for_targets(token, page_id)
+    if targets["age"]["id"] and targets["season"]["id"]:
+        widget_registry.remember(registry, page_id, "age", targets["age"], AGE_SIGNATURE)
+        widget_registry.remember(registry, page_id, "season", targets["season"], SEASON_SIGNATURE)
+        widget_registry.save_registry(registry)
+    return targets
+
+def update_notion_block_content(token, block_id, rich_text_list, block_type="paragraph", current=None):
+    """
+    특정 블록의 내용을 업데이트합니다.
+    current(스캔 때 받은 블록)와 내용이 같으면 PATCH 하지 않고 "skipped" 를 반환합니다.
+    """
+    # 블록 타입에 맞춰 페이로드 생성 (기본적으로 paragraph로 취급)
+    payload_type = "callout" if block_type == "callout" else "paragraph"
+    return block_writer.write_rich_text(token, block_id, payload_type, rich_text_list, current=current)
+
+def read_settings(token, page_id):
+    """
+    페이지 최상위 블록과 '설정' 토글의 자식을 한 번씩만 읽습니다.
+    get_config_from_notion 과 ensure_settings_block 이 같은 결과를 나눠 씁니다.
+    토글 안의 수정은 토글의 last_edited_time 에 반영되지 않으므로 자식은 페이지 사본을 거치지 않고 읽습니다.
+    반환값: (최상위 블록 목록, 설정 토글 또는 None, 토글의 자식 목록)
+    """
+    blocks = block_walker.fetch_all_children(token, page_id)
+    toggle = next((b for b in blocks if b.get("type") == "toggle" and "설정" in block_writer.block_plain_text(b)), None)
+    toggle_children = block_walker.fetch_all_children(token, toggle["id"], fresh=True) if toggle else []
+    return blocks, toggle, toggle_children
+
+def get_config_from_notion(token, page_id, settings=None):
     """
     Notion 페이지의 블록들을 스캔하여 설정값을 읽어옵니다. (이름, 생일)
+    settings 는 read_settings() 의 결과입니다 (없으면 직접 읽음).
     """
     config = {}
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-    headers = { "Authorization": f"Bearer {token}", "Notion-Version": "2022-06-28" }
     
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200: return {}
-        data = response.json()
-        
-        results = data.get("results", [])
+        blocks, toggle, toggle_children = settings or read_settings(token, page_id)
         
-        for block in results:
-            b_type = block.get("type")
+        for block in blocks:
             text = ""
-            if b_type in ["paragraph", "toggle", "callout", "heading_1", "heading_2", "heading_3"]:
-                 rich_texts = block.get(b_type, {}).get("rich_text", [])
-                 text = "".join([t.get("plain_text", "") for t in rich_texts])
+            if block.get("type") in ["paragraph", "toggle", "callout", "heading_1", "heading_2", "heading_3"]:
+                text = block_writer.block_plain_text(block)
             
             if "이름:" in text: config["pet_name"] = text.split("이름:")[1].strip()
             if "생일:" in text: config["birthday"] = text.split("생일:")[1].strip()
             
-            if b_type == "toggle" and "설정" in text:
-                 t_url = f"https://api.notion.com/v1/blocks/{block['id']}/children"
-                 t_res = requests.get(t_url, headers=headers)
-                 if t_res.status_code == 200:
-                     t_children = t_res.json().get("results", [])
-                     for child in t_children:
-                         c_type = child.get("type")
-                         c_text = ""
-                         if c_type in ["paragraph", "callout"]:
-                             rts = child.get(c_type, {}).get("rich_text", [])
-                             c_text = "".join([t.get("plain_text", "") for t in rts])
-                         
-                         if "이름:" in c_text: config["pet_name"] = c_text.split("이름:")[1].strip()
-                         if "생일:" in c_text: config["birthday"] = c_text.split("생일:")[1].strip()
+        for child in toggle_children:
+            c_text = ""
+            if child.get("type") in ["paragraph", "callout"]:
+                c_text = block_writer.block_plain_text(child)
+            
+            if "이름:" in c_text: config["pet_name"] = c_text.split("이름:")[1].strip()
+            if "생일:" in c_text: config["birthday"] = c_text.split("생일:")[1].strip()
                          
     except Exception as e:
         print(f"Config scan error: {e}")
@@ -245,205 +231,257 @@ def load_config():
             config.update(json.load(f))
     return config
 
-def ensure_settings_block(token, page_id, default_name="우유", default_birthday="2013-09-30"):
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-    headers = { 
-        "Authorization": f"Bearer {token}", 
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-
-    # Step 1: Check existing block
-    existing_block_id = None
-    needs_update = False
-    
-    res = requests.get(url, headers=headers)
-    if res.status_code == 200:
-        for b in res.json().get("results", []):
-            if b.get("type") == "toggle":
-                # Check contents
-                rich_text = b.get("toggle", {}).get("rich_text", [])
-                txt = "".join([t.get("plain_text", "") for t in rich_text])
-                if "설정" in txt:
-                    existing_block_id = b.get("id")
-                    # Check if it has the new fields (e.g. check children or assume based on content if we could read children here)
-                    # To be safe, we can read children or just rely on a force update if we can't confirm.
-                    # Let's read the children of this block to check for "성별"
-                    child_url = f"https://api.notion.com/v1/blocks/{existing_block_id}/children"
-                    c_res = requests.get(child_url, headers=headers)
-                    if c_res.status_code == 200:
-                        c_txt = ""
-                        for c in c_res.json().get("results", []):
-                            if c.get("type") in ["paragraph", "callout"]:
-                                c_rts = c.get(c.get("type"), {}).get("rich_text", [])
-                                c_txt += "".join([t.get("plain_text", "") for t in c_rts])
-                        
-                        if "성별:" not in c_txt:
-                            print("Old settings block found. Updating schema...")
-                            needs_update = True
-                        else:
-                            return # Already up to date
-                    break
-
-    if existing_block_id and needs_update:
-        # Delete old block
-        del_url = f"https://api.notion.com/v1/blocks/{existing_block_id}"
-        requests.delete(del_url, headers=headers)
-        print("Deleted old settings block.")
-
-    # Step 2: Create the Toggle Block
-    payload_parent = {
-        "children": [
-            {
-                "object": "block", "type": "toggle",
-                "toggle": { 
-                    "rich_text": [{ "type": "text", "text": { "content": "⚙️ 설정 (클릭하여 반려견 정보 입력)" } }] 
-                }
-            }
-        ]
-    }
-    response = requests.patch(url, headers=headers, json=payload_parent)
-    if response.status_code != 200:
-        print(f"Failed to create settings parent block: {response.text}")
-        return
+# 설정 토글 안의 항목 (이름, 생일은 현재 설정값으로 채움)
+SETTINGS_FIELDS = [
+    "이름: {name}",
+    "생일: {birthday}",
+    "견종: ",
+    "성별: ",
+    "중성화 여부: ",
+    "몸무게 (kg): ",
+    "동물등록번호: ",
+    "마이크로칩 위치: ",
+    "옷 사이즈: ",
+    "현재 먹는 사료: ",
+    "좋아하는 간식: ",
+    "혈액형: ",
+    "알레르기: ",
+    "마지막 예방접종일: ",
+    "동물병원 연락처: "
+]
 
-    # Get the new block ID
-    new_blocks = response.json().get("results", [])
-    if not new_blocks:
-        print("Created block but got no results?")
-        return
-        
-    toggle_block_id = new_blocks[0].get("id")
-    print(f"Settings block created ({toggle_block_id}). Adding content...")
-    
-    # Step 3: Add children to the new Toggle Block
-    # List of fields to add
-    fields = [
-        f"이름: {default_name}",
-        f"생일: {default_birthday}",
-        "견종: ",
-        "성별: ",
-        "중성화 여부: ",
-        "몸무게 (kg): ",
-        "동물등록번호: ",
-        "마이크로칩 위치: ",
-        "옷 사이즈: ",
-        "현재 먹는 사료: ",
-        "좋아하는 간식: ",
-        "혈액형: ",
-        "알레르기: ",
-        "마지막 예방접종일: ",
-        "동물병원 연락처: "
-    ]
-    
-    children_payload = []
-    for field in fields:
-        children_payload.append({
-            "object": "block", "type": "paragraph",
-            "paragraph": { "rich_text": [{ "type": "text", "text": { "content": field } }] }
-        })
-    
-    # Add help callout
-    children_payload.append({
-        "object": "block", "type": "callout", 
-        "callout": { 
-            "rich_text": [{ "type": "text", "text": { "content": "내용을 자유롭게 수정하세요. (이름, 생일은 자동 반영)" } }], 
-            "icon": { "type": "emoji", "emoji": "💡" } 
-        } 
+def settings_key(block, previous=None):
+    # 항목은 "라벨:" 로 맞춰서, 사용자가 적은 값은 그대로 두고 빠진 항목만 추가합니다.
+    text = block_writer.block_plain_text(block)
+    b_type = block.get("type")
+    if b_type == "toggle" and "설정" in text:
+        return "settings"
+    if b_type == "callout":
+        return "help"
+    if ":" in text:
+        return b_type, text.split(":")[0].strip()
+    return block_reconciler.default_key(block, previous)
+
+def settings_section(name, birthday):
+    fields = [{
+        "type": "paragraph", "keep": True,
+        "paragraph": { "rich_text": [{ "type": "text", "text": { "content": field.format(name=name, birthday=birthday) } }] }
+    } for field in SETTINGS_FIELDS]
+    fields.append({
+        "type": "callout",
+        "callout": {
+            "rich_text": [{ "type": "text", "text": { "content": "내용을 자유롭게 수정하세요. (이름, 생일은 자동 반영)" } }],
+            "icon": { "type": "emoji", "emoji": "💡" }
+        }
     })
+    return [{
+        "type": "toggle", "keep": True,
+        "toggle": { "rich_text": [{ "type": "text", "text": { "content": "⚙️ 설정 (클릭하여 반려견 정보 입력)" } }] },
+        "children": fields
+    }]
 
-    url_children = f"https://api.notion.com/v1/blocks/{toggle_block_id}/children"
-    
-    # Batch add (Note: Notion allows up to 100 children per request, we have ~16 so it fits)
-    payload_children = { "children": children_payload }
+def ensure_settings_block(token, page_id, default_name="우유", default_birthday="2013-09-30", settings=None):
+    """
+    설정 토글이 없으면 항목과 함께 한 번에 만들고, 있으면 빠진 항목만 제자리에 추가합니다.
+    settings 는 read_settings() 의 결과입니다 (없으면 직접 읽음).
+    """
+    blocks, toggle, _ = settings or read_settings(token, page_id)
+    try:
+        block_reconciler.reconcile(token, page_id, settings_section(default_name, default_birthday),
+                                   key=settings_key, current=blocks)
+    except notion_client.NotionAPIError as e:
+        print(f"Failed to update settings block: {e}")
+        return
+    if not toggle:
+        print("Settings block created.")
+
+def pet_from_page(page):
+    props = page.get("properties", {})
+    pet = {"page_id": page["id"]}
     
-    resp_child = requests.patch(url_children, headers=headers, json=payload_children)
-    if resp_child.status_code != 200:
-        print(f"Failed to add children to settings block: {resp_child.text}")
-    else:
-        print("Settings content added successfully.")
+    # 이름 (Title)
+    name_prop = props.get("이름", {}).get("title", [])
+    if name_prop:
+        pet["pet_name"] = name_prop[0].get("plain_text", "")
+        
+    # 생일 (Date)
+    date_prop = props.get("생일", {}).get("date", {})
+    if date_prop:
+        pet["birthday"] = date_prop.get("start", "")
+    return pet
 
-def get_config_from_database(token, page_id):
+def get_pets_from_database(token, page_id):
     """
-    페이지 내의 '반려견 정보' 데이터베이스를 찾아서 첫 번째 항목의 이름과 생일을 반환합니다.
+    페이지 내의 '반려견 정보' 데이터베이스의 모든 항목을 DB 순서대로 반환합니다.
+    [{"page_id", "pet_name", "birthday"}] — 첫 번째 항목이 메인 페이지 설정의 기본값입니다.
     """
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    # 1. 페이지의 자식 중 데이터베이스 찾기
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children"
+    # 1. 워크스페이스 카탈로그(로컬 캐시)에서 페이지 아래의 데이터베이스 찾기
     db_id = None
     
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            for block in response.json().get("results", []):
-                if block.get("type") == "child_database":
-                    # 제목 확인
-                    if "반려견 정보" in block.get("child_database", {}).get("title", ""):
-                        db_id = block.get("id")
-                        print(f"반려견 정보 데이터베이스 발견: {db_id}")
-                        break
+        db_id = workspace_catalog.find_database(token, "반려견 정보", parent_id=page_id)
+        if db_id:
+            print(f"반려견 정보 데이터베이스 발견: {db_id}")
     except Exception as e:
         print(f"DB 검색 실패: {e}")
         
     if not db_id:
         # DB가 없으면 기존 방식(텍스트 파싱)이나 기본값 사용
-        return {}
+        return []
         
-    # 2. 데이터베이스 쿼리
-    query_url = f"https://api.notion.com/v1/databases/{db_id}/query"
+    # 2. 데이터베이스 쿼리 (끝까지 페이지네이션)
+    pages = []
+    payload = {"page_size": 100}
     try:
-        # 첫 번째 페이지만 가져옴
-        q_response = requests.post(query_url, headers=headers, json={"page_size": 1})
-        if q_response.status_code == 200:
-            results = q_response.json().get("results", [])
-            if results:
-                page = results[0]
-                props = page.get("properties", {})
-                
-                config = {}
-                
-                # 이름 (Title)
-                name_prop = props.get("이름", {}).get("title", [])
-                if name_prop:
-                    config["pet_name"] = name_prop[0].get("plain_text", "")
-                    
-                # 생일 (Date)
-                date_prop = props.get("생일", {}).get("date", {})
-                if date_prop:
-                    config["birthday"] = date_prop.get("start", "")
-                    
-                print(f"DB에서 설정 로드: {config}")
-                return config
-                
+        while True:
+            q_response = notion_client.post(token, f"/databases/{db_id}/query", payload)
+            if q_response.status_code == 404 and not pages and "start_cursor" not in payload:
+                # 캐시된 ID 가 삭제된 DB 를 가리키는 경우 카탈로그를 새로 고쳐서 한 번 더 시도
+                db_id = workspace_catalog.find_database(token, "반려견 정보", parent_id=page_id, refresh=True)
+                if not db_id:
+                    return []
+                q_response = notion_client.post(token, f"/databases/{db_id}/query", payload)
+            notion_client.raise_for_error(q_response)
+            data = q_response.json()
+            pages.extend(data.get("results", []))
+            if not data.get("has_more") or not data.get("next_cursor"):
+                break
+            payload = dict(payload, start_cursor=data["next_cursor"])
     except Exception as e:
         print(f"DB 쿼리 실패: {e}")
+        return []
         
-    return {}
+    pets = [pet_from_page(page) for page in pages]
+    print(f"DB에서 {len(pets)}마리 설정 로드: {[pet.get('pet_name') for pet in pets]}")
+    return pets
 
-def main():
-    token = os.environ.get("NOTION_TOKEN")
-    page_id = os.environ.get("NOTION_PAGE_ID")
+def get_config_from_database(token, page_id):
+    """
+    '반려견 정보' 데이터베이스 첫 번째 항목의 이름과 생일을 반환합니다.
+    """
+    pets = get_pets_from_database(token, page_id)
+    if not pets:
+        return {}
+    return {key: value for key, value in pets[0].items() if key in ("pet_name", "birthday")}
+
+# 동시에 갱신할 반려동물 수. 실제 처리량은 rate_limiter 가 제한합니다.
+PET_CONCURRENCY = 8
+
+def pet_widget_key(block, previous=None):
+    if block.get("type") == "paragraph" and widget_registry.matches_signature(block, AGE_SIGNATURE):
+        return "age"
+    if block.get("type") == "paragraph" and widget_registry.matches_signature(block, SEASON_SIGNATURE):
+        return "season"
+    return block_reconciler.default_key(block, previous)
+
+def pet_section(widget):
+    return [
+        {"type": "paragraph", "paragraph": {"rich_text": widget["age"]}},
+        {"type": "paragraph", "paragraph": {"rich_text": widget["season"]}},
+    ]
+
+def update_pet_page(token, widget):
+    """
+    반려동물 항목 페이지 안의 나이/계절 블록을 갱신합니다.
+    레지스트리에 블록과 마지막으로 쓴 내용이 있으면 바뀐 블록만 바로 PATCH 하고 (평소 0~1회),
+    없거나 PATCH 가 실패하면 항목 페이지를 reconcile 해서 블록을 찾거나 만듭니다.
+    """
+    registry = widget_registry.load_registry()
+    pet_page = widget["page_id"]
+    entries = {name: widget_registry.get_entry(registry, pet_page, name) for name in ("age", "season")}
+    results = {}
+    if all(entries.values()):
+        results = {name: block_writer.write_rich_text(token, entry["id"], "paragraph", widget[name],
+                                                      last_key=entry.get("content"))
+                   for name, entry in entries.items()}
+        if all(results.values()):
+            if "updated" in results.values():
+                for name in entries:
+                    widget_registry.set_content(registry, pet_page, name,
+                                                block_writer.content_key("paragraph", widget[name]))
+                widget_registry.save_registry(registry)
+            return results
+        print(f"Widgets of {widget['pet_name']} are gone or changed. Reconciling...")
     
-    if not token or not page_id:
-        print("Error: Notion Token or Page ID missing.")
+    ids = block_reconciler.reconcile(token, pet_page, pet_section(widget), key=pet_widget_key)
+    for name, signature in (("age", AGE_SIGNATURE), ("season", SEASON_SIGNATURE)):
+        widget_registry.remember(registry, pet_page, name, {"id": ids[name], "type": "paragraph"}, signature,
+                                 content=block_writer.content_key("paragraph", widget[name]))
+    widget_registry.save_registry(registry)
+    # 앞에서 PATCH 한 블록은 reconcile 이 그대로 두므로 그 결과도 "updated" 로 남깁니다.
+    status = "updated" if ids.writes else "skipped"
+    return {name: "updated" if results.get(name) == "updated" else status for name in ("age", "season")}
+
+def update_main_page(token, targets_future, widget):
+    try:
+        targets = targets_future.result()
+    except notion_client.NotionAPIError as e:
+        print(f"Scan aborted: {e}")
+        return
+    
+    age_info = targets["age"]
+    season_info = targets["season"]
+    
+    if not age_info["id"] or not season_info["id"]:
+        print(f"Could not find targets. Age: {age_info}, Season: {season_info}")
         return
 
+    # Update Blocks
+    result = update_notion_block_content(token, age_info["id"], widget["age"], age_info["type"], age_info.get("block"))
+    if result == "skipped":
+        print("Age Block is already up to date.")
+    elif result:
+        print("Updated Age Block successfully.")
+        
+    result = update_notion_block_content(token, season_info["id"], widget["season"], season_info["type"],
+                                         season_info.get("block"))
+    if result == "skipped":
+        print("Season Block is already up to date.")
+    elif result:
+        print("Updated Season Block successfully.")
+
+def update_other_pets(token, widgets):
+    """
+    나머지 반려동물의 항목 페이지를 동시에 갱신합니다. 한 마리가 실패해도 나머지는 계속합니다.
+    """
+    def run(widget):
+        try:
+            return update_pet_page(token, widget)
+        except notion_client.NotionAPIError as e:
+            print(f"Pet widget update failed for {widget['pet_name']}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(PET_CONCURRENCY, len(widgets)),
+                            initializer=notion_client.job_initializer()) as pool:
+        results = list(pool.map(run, widgets))
+    written = sum(1 for r in results if r and "updated" in r.values())
+    print(f"Pet pages: {len(widgets)} pets, {written} updated, "
+          f"{sum(1 for r in results if r is None)} failed.")
+
+def update_all(token, page_id):
+    """
+    설정을 읽고 메인 페이지와 모든 반려동물의 나이/계절 블록을 갱신합니다.
+    """
     config = load_config()
     
-    # 1. DB에서 설정 로드 (기본값)
-    print("Notion 데이터베이스에서 설정을 확인합니다...")
-    db_config = get_config_from_database(token, page_id)
-    if db_config:
-        config.update(db_config)
-    
-    # 2. 텍스트 설정 블록 확인 (현재 값 읽기)
-    print("텍스트 설정 블록을 확인합니다...")
-    notion_config = get_config_from_notion(token, page_id)
+    # 1~2. DB 설정, 텍스트 설정 블록(페이지 children + 설정 토글 children 한 번씩), 대상 블록 확인은
+    # 서로 독립적이라 동시에 진행합니다. 같은 GET 은 notion_client 스냅샷이 한 번만 보냅니다.
+    print("Notion 데이터베이스와 텍스트 설정 블록에서 설정을 확인합니다...")
+    with ThreadPoolExecutor(max_workers=3, initializer=notion_client.job_initializer()) as pool:
+        pets_future = pool.submit(get_pets_from_database, token, page_id)
+        settings_future = pool.submit(read_settings, token, page_id)
+        targets_future = pool.submit(find_targets, token, page_id)
+        pets = pets_future.result()
+        try:
+            settings = settings_future.result()
+        except notion_client.NotionAPIError as e:
+            print(f"Config scan error: {e}")
+            settings = None
+
+    # DB 첫 번째 항목이 기본값, 텍스트 설정이 있으면 그게 우선
+    if pets:
+        config.update({key: value for key, value in pets[0].items() if key in ("pet_name", "birthday")})
+    notion_config = get_config_from_notion(token, page_id, settings) if settings else {}
     if notion_config:
         print(f"텍스트 설정 발견: {notion_config}")
         config.update(notion_config)
@@ -453,37 +491,41 @@ def main():
     current_name = config.get("pet_name", "우유")
     current_birthday = config.get("birthday", "2013-09-30")
     
-    ensure_settings_block(token, page_id, current_name, current_birthday)
+    if settings:
+        ensure_settings_block(token, page_id, current_name, current_birthday, settings)
 
     pet_name = config.get("pet_name")
     birth_date_str = config.get("birthday")
     print(f"최종 설정: {pet_name}, {birth_date_str}")
     
-    try:
-        years, months, days, total_days = calculate_age(birth_date_str)
-        birth_date_obj = datetime.strptime(birth_date_str, "%Y-%m-%d")
-    except Exception as e:
-        print(f"Date Error: {e}")
-        return
+    # 4. 모든 반려동물의 나이/계절을 같은 기준일로 한 번에 계산하고,
+    # 메인 페이지와 나머지 반려동물(각자의 DB 항목 페이지)을 동시에 갱신합니다.
+    # 메인 페이지에 표시되는 반려동물(최종 설정의 이름)의 항목 페이지에는 위젯을 만들지 않습니다.
+    primary = {"page_id": None, "pet_name": pet_name, "birthday": birth_date_str}
+    widgets = pet_widgets([primary] + [pet for pet in pets if pet.get("pet_name") != pet_name])
+    main_widget = widgets.pop(0) if widgets and widgets[0]["page_id"] is None else None
 
-    print("Scanning page for target blocks (Smart Find)...")
-    targets = scan_page_for_targets(token, page_id)
-    
-    age_info = targets["age"]
-    season_info = targets["season"]
+    with ThreadPoolExecutor(max_workers=2, initializer=notion_client.job_initializer()) as pool:
+        futures = []
+        if main_widget:
+            futures.append(pool.submit(update_main_page, token, targets_future, main_widget))
+        if widgets:
+            futures.append(pool.submit(update_other_pets, token, widgets))
+    for future in futures:
+        future.result()
+
+def main():
+    notion_metrics.start_run("update_age")
+    token = os.environ.get("NOTION_TOKEN")
+    page_id = os.environ.get("NOTION_PAGE_ID")
     
-    if not age_info["id"] or not season_info["id"]:
-        print(f"Could not find targets. Age: {age_info}, Season: {season_info}")
+    if not token or not page_id:
+        print("Error: Notion Token or Page ID missing.")
         return
 
-    # Update Blocks
-    age_rich_text = get_age_rich_text(years, months, days, total_days)
-    if update_notion_block_content(token, age_info["id"], age_rich_text, age_info["type"]):
-        print("Updated Age Block successfully.")
-        
-    season_rich_text = get_season_rich_text(birth_date_obj, pet_name)
-    if update_notion_block_content(token, season_info["id"], season_rich_text, season_info["type"]):
-        print("Updated Season Block successfully.")
+    # 이번 실행 안에서 같은 GET 은 한 번만 보냅니다 (스캔이 필요하면 find_targets 가 페이지 사본을 씀).
+    with notion_client.shared_snapshot():
+        update_all(token, page_id)
 
 if __name__ == "__main__":
     main()
@@ -1,169 +1,77 @@
 import os
-import requests
 import json
 import random
 import sys
+import notion_client
+import notion_metrics
+import block_reconciler
+import block_writer
+import love_letter_corpus
+import widget_registry
 
 # Force UTF-8 for stdout/stderr to handle emojis on Windows
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 
 def get_random_love_letter(token, db_id):
-    url = f"https://api.notion.com/v1/databases/{db_id}/query"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    # Fetch all entries (assuming not more than 100 for now, or pagination if needed)
-    # For a simple randomizer, one page is enough to start.
-    payload = { "page_size": 100 }
-    
+    # 로컬 편지 모음(전체 페이지네이션 + 증분 갱신)에서 고르므로 100개 넘게 있어도 고르게 뽑힙니다.
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        if response.status_code != 200:
-            print(f"Failed to query database: {response.status_code} {response.text}")
-            return None
-            
-        results = response.json().get("results", [])
-        if not results:
-            print("No entries found in Love Letter database.")
-            return None
-            
-        # Pick random
-        choice = random.choice(results)
-        page_id = choice.get("id")
-        
-        # Try to get page content (children)
-        child_url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-        child_res = requests.get(child_url, headers=headers)
-        
-        lines = []
-        if child_res.status_code == 200:
-            blocks = child_res.json().get("results", [])
-            for block in blocks:
-                if block.get("type") == "paragraph":
-                    text_list = block.get("paragraph", {}).get("rich_text", [])
-                    plain_text = "".join([t.get("plain_text", "") for t in text_list])
-                    if plain_text.strip():
-                        lines.append(plain_text)
-        
-        # If body is empty, fallback to title
-        if not lines:
-            props = choice.get("properties", {})
-            title_prop = props.get("하고싶은 말", {}).get("title", [])
-            if title_prop:
-                text = "".join([t.get("plain_text", "") for t in title_prop])
-                lines.append(text)
-            else:
-                 return "사랑해" # Fallback
-        
-        # Return the list of lines directly
-        return lines
-        
+        letters = love_letter_corpus.refresh(token, db_id, full=os.environ.get("LOVE_LETTER_FULL_SYNC") == "1")
     except Exception as e:
         print(f"Error getting love letter: {e}")
         return None
-
-def find_or_create_target_blocks(token, page_id):
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    heading_id = None
-    callout_id = None
-    
-    # Scan page
-    res = requests.get(url, headers=headers)
-    if res.status_code == 200:
-        blocks = res.json().get("results", [])
-        for i, block in enumerate(blocks):
-            if block.get("type") == "heading_1":
-                txt = "".join([t.get("plain_text", "") for t in block.get("heading_1", {}).get("rich_text", [])])
-                if "Love letter" in txt or "Love Letter" in txt:
-                    heading_id = block.get("id")
-                    # Check next block for callout
-                    if i + 1 < len(blocks) and blocks[i+1].get("type") == "callout":
-                        callout_id = blocks[i+1].get("id")
-                    break
+        
+    if not letters:
+        print("No entries found in Love Letter database.")
+        return None
+        
+    # Pick random (sorted so the same seed picks the same letter)
+    page_id = random.choice(sorted(letters))
     
-    # Create if missing
-    if not heading_id:
-        print("Creating 'Love Letter' section...")
-        # We append to the bottom for now, or top if preferred. Let's append to bottom.
-        payload = {
-            "children": [
-                {
-                    "object": "block", "type": "heading_1",
-                    "heading_1": { "rich_text": [{ "text": { "content": "💌 Love Letter" } }] }
-                },
-                {
-                    "object": "block", "type": "callout",
-                    "callout": {
-                        "rich_text": [{ "text": { "content": "Loading..." } }],
-                        "icon": { "emoji": "💝" }
-                    }
-                }
-            ]
-        }
-        res = requests.patch(url, headers=headers, json=payload)
-        if res.status_code == 200:
-            new_blocks = res.json().get("results", [])
-            if len(new_blocks) >= 2:
-                callout_id = new_blocks[1].get("id")
-        else:
-            print(f"Failed to create section: {res.text}")
-            
-    elif not callout_id:
-        print("Found header but missing Callout. Creating Callout...")
-        # Append callout after heading? 
-        # API doesn't easily support "insert after ID" directly in 'append' endpoint without re-ordering.
-        # But 'append' adds to end. 
-        # For simplicity, let's just add it to the end of page if not found immediately after.
-        # Or better, just add it to the end of page.
-        payload = {
-            "children": [
-                {
-                    "object": "block", "type": "callout",
-                    "callout": {
-                        "rich_text": [{ "text": { "content": "Loading..." } }],
-                        "icon": { "emoji": "💝" }
-                    }
-                }
-            ]
+    # Return the list of lines directly
+    return letters[page_id]["lines"]
+
+# 💌 Love Letter 제목과 바로 아래 callout. 둘 다 이미 있으면 내용(편지)은 건드리지 않습니다.
+LOVE_LETTER_SECTION = [
+    {
+        "type": "heading_1", "keep": True,
+        "heading_1": { "rich_text": [{ "text": { "content": "💌 Love Letter" } }] }
+    },
+    {
+        "type": "callout", "keep": True,
+        "callout": {
+            "rich_text": [{ "text": { "content": "Loading..." } }],
+            "icon": { "emoji": "💝" }
         }
-        res = requests.patch(url, headers=headers, json=payload)
-        if res.status_code == 200:
-            callout_id = res.json().get("results", [])[0].get("id")
-            
-    return callout_id
+    }
+]
+
+def love_letter_key(block, previous=None):
+    b_type = block.get("type")
+    if b_type == "heading_1" and "love letter" in block_writer.block_plain_text(block).lower():
+        return "heading"
+    if b_type == "callout" and previous == "heading":
+        return "callout"
+    return block_reconciler.default_key(block, previous)
+
+def find_or_create_target_blocks(token, page_id):
+    # 제목이 없으면 둘 다 페이지 끝에, callout 만 없으면 제목 바로 뒤에 만듭니다.
+    try:
+        ids = block_reconciler.reconcile(token, page_id, LOVE_LETTER_SECTION, key=love_letter_key)
+    except notion_client.NotionAPIError as e:
+        print(f"Failed to create section: {e}")
+        return None
+    return ids.get("callout")
 
 def get_child_block_id(token, parent_id):
-    url = f"https://api.notion.com/v1/blocks/{parent_id}/children"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    res = requests.get(url, headers=headers)
+    res = notion_client.get(token, f"/blocks/{parent_id}/children")
     if res.status_code == 200:
         results = res.json().get("results", [])
         if results:
             return results[0].get("id"), results[0].get("type")
     return None, None
 
-def update_equation_block(token, block_id, block_type, lines):
-    url = f"https://api.notion.com/v1/blocks/{block_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-
+def letter_rich_text(lines):
     # Format each line individually
     # Each line format: \texttt{\scriptsize \color{green}{TEXT}}
     formatted_lines = [f"\\texttt{{\\scriptsize \\color{{green}}{{{line}}}}}" for line in lines]
@@ -175,24 +83,55 @@ def update_equation_block(token, block_id, block_type, lines):
     # Just raw lines joined, no wrapper environment as requested
     latex_content = lines_joined
     
-    payload = {
-        block_type: { # e.g. "paragraph"
-            "rich_text": [
-                {
-                    "type": "equation",
-                    "equation": { "expression": latex_content }
-                }
-            ]
+    return [
+        {
+            "type": "equation",
+            "equation": { "expression": latex_content }
         }
-    }
-    
-    res = requests.patch(url, headers=headers, json=payload)
-    if res.status_code == 200:
+    ]
+
+def update_equation_block(token, block_id, block_type, lines, last_key=None):
+    # last_key: 지난번에 이 블록에 쓴 내용의 content_key (같으면 PATCH 생략)
+    result = block_writer.write_rich_text(token, block_id, block_type, letter_rich_text(lines), last_key=last_key)
+    if result == "skipped":
+        print("Block already shows this letter. Skipped.")
+    elif result:
         print("Block updated successfully.")
-    else:
-        print(f"Failed to update block: {res.text}")
+    return result
+
+def update_letter_block(token, page_id, callout_id, lines):
+    """
+    저장해 둔 callout 자식 블록을 바로 PATCH 합니다.
+    실패하면(삭제 / 타입 변경) callout 의 자식을 다시 찾아서 등록합니다.
+    """
+    registry = widget_registry.load_registry()
+    entry = widget_registry.get_entry(registry, page_id, "love_letter")
+    if entry and entry.get("parent") == callout_id.replace("-", ""):
+        print(f"Updating registered block {entry['id']} ({entry['type']})...")
+        if update_equation_block(token, entry["id"], entry["type"], lines, entry.get("content")):
+            widget_registry.set_content(registry, page_id, "love_letter",
+                                        block_writer.content_key(entry["type"], letter_rich_text(lines)))
+            widget_registry.save_registry(registry)
+            return True
+        widget_registry.forget(registry, page_id, "love_letter")
+        widget_registry.save_registry(registry)
+    
+    print(f"Finding child block of {callout_id}...")
+    child_id, child_type = get_child_block_id(token, callout_id)
+    if not child_id or not child_type:
+        print("Could not find child block to update.")
+        return False
+    
+    print(f"Updating child block {child_id} ({child_type})...")
+    if not update_equation_block(token, child_id, child_type, lines):
+        return False
+    widget_registry.remember(registry, page_id, "love_letter", {"id": child_id, "type": child_type},
+                             [], parent_id=callout_id, content=block_writer.content_key(child_type, letter_rich_text(lines)))
+    widget_registry.save_registry(registry)
+    return True
 
 def main():
+    notion_metrics.start_run("update_love_letter")
     token = os.environ.get("NOTION_TOKEN")
     page_id = os.environ.get("NOTION_PAGE_ID")
     db_id = "2f60d907-031e-8085-80ae-eb6323149741" 
@@ -210,14 +149,7 @@ def main():
         return
     print(f"Selected: {lines}")
     
-    print(f"Finding child block of {target_callout_id}...")
-    child_id, child_type = get_child_block_id(token, target_callout_id)
-    
-    if child_id and child_type:
-        print(f"Updating child block {child_id} ({child_type})...")
-        update_equation_block(token, child_id, child_type, lines)
-    else:
-        print("Could not find child block to update.")
+    update_letter_block(token, page_id, target_callout_id, lines)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,105 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import notion_client
+import local_cache
+import block_writer
+
+REGISTRY_FILE = "widget_registry.json"
+
+TEXT_BLOCK_TYPES = ["paragraph", "heading_1", "heading_2", "heading_3", "callout", "quote", "toggle"]
+
+_registry = None
+_lock = threading.RLock()
+
+def load_registry():
+    # 한 프로세스에서 여러 작업이 돌 때 서로의 항목을 덮어쓰지 않도록 같은 dict 를 나눠 씁니다.
+    global _registry
+    with _lock:
+        if _registry is None:
+            _registry = local_cache.load_json(REGISTRY_FILE, {})
+        return _registry
+
+def save_registry(registry):
+    with _lock:
+        local_cache.save_json(REGISTRY_FILE, registry)
+
+def block_text(block):
+    """
+    텍스트 블록의 글자(수식은 expression)를 반환합니다. 다른 블록은 빈 문자열.
+    """
+    if block.get("type") not in TEXT_BLOCK_TYPES:
+        return ""
+    return block_writer.block_plain_text(block)
+
+def matches_signature(block, signature):
+    # signature: 블록 텍스트에 하나라도 들어 있어야 하는 문자열 목록 (비어 있으면 통과)
+    if not signature:
+        return True
+    text = block_text(block)
+    return any(marker in text for marker in signature)
+
+def remember(registry, page_id, name, block, signature, parent_id=None, content=None):
+    # content: 마지막으로 쓴 내용의 block_writer.content_key (같으면 다음 PATCH 생략)
+    entry = {
+        "id": block.get("id"),
+        "type": block.get("type"),
+        "signature": list(signature),
+    }
+    if parent_id:
+        entry["parent"] = parent_id.replace("-", "")
+    if content:
+        entry["content"] = content
+    with _lock:
+        registry.setdefault(page_id.replace("-", ""), {})[name] = entry
+
+def get_entry(registry, page_id, name):
+    return registry.get(page_id.replace("-", ""), {}).get(name)
+
+def set_content(registry, page_id, name, content):
+    # 다른 스레드가 save_registry 로 같은 dict 를 쓰는 중일 수 있으므로 잠금 안에서 바꿉니다.
+    with _lock:
+        entry = get_entry(registry, page_id, name)
+        if entry:
+            entry["content"] = content
+
+def forget(registry, page_id, name):
+    with _lock:
+        registry.get(page_id.replace("-", ""), {}).pop(name, None)
+
+def _fetch_block(token, block_id):
+    res = notion_client.get(token, f"/blocks/{block_id}")
+    if res.status_code in (400, 404):
+        # 삭제되었거나 접근 권한이 없어진 블록
+        return None
+    notion_client.raise_for_error(res)
+    return res.json()
+
+def _is_valid(block, entry):
+    if block is None or block.get("archived") or block.get("in_trash"):
+        return False
+    if block.get("type") != entry.get("type"):
+        return False
+    parent = entry.get("parent")
+    if parent and (block.get("parent", {}).get("block_id") or "").replace("-", "") != parent:
+        return False
+    return matches_signature(block, entry.get("signature"))
+
+def validate_targets(token, registry, page_id, names):
+    """
+    레지스트리에 저장된 대상 블록들을 GET /blocks/{id} 로 확인합니다.
+    모두 유효하면 name -> 현재 블록 dict 를, 하나라도 없거나 시그니처가 다르면 None 을 반환합니다.
+    """
+    entries = registry.get(page_id.replace("-", ""), {})
+    if any(name not in entries for name in names):
+        return None
+
+    with ThreadPoolExecutor(max_workers=len(names), initializer=notion_client.job_initializer()) as pool:
+        blocks = list(pool.map(lambda name: _fetch_block(token, entries[name]["id"]), names))
+
+    valid = {}
+    for name, block in zip(names, blocks):
+        if not _is_valid(block, entries[name]):
+            print(f"Registered '{name}' block {entries[name]['id']} is gone or changed. Rescanning...")
+            return None
+        valid[name] = block
+    return valid
@@ -0,0 +1,131 @@
+import datetime
+import os
+import threading
+import notion_client
+import local_cache
+
+CATALOG_FILE = "workspace_catalog.json"
+CATALOG_TTL = datetime.timedelta(hours=float(os.environ.get("NOTION_CATALOG_TTL_HOURS", 24)))
+
+_catalog = None
+_fetched = False  # 이번 실행에서 이미 새로 가져왔는지
+_lock = threading.Lock()  # 같은 프로세스의 여러 작업이 동시에 새로 가져오지 않도록
+
+def _utcnow():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def _plain_title(db):
+    return "".join(t.get("plain_text", "") for t in db.get("title", [])).strip()
+
+def _normalize_id(object_id):
+    return (object_id or "").replace("-", "")
+
+def fetch_catalog(token):
+    """
+    /v1/search 를 끝까지 페이지네이션해서 통합이 볼 수 있는 모든 데이터베이스
+    (페이지 안의 child database 포함)의 이름, 부모, 스키마를 모읍니다.
+    """
+    databases = {}
+    payload = {"filter": {"value": "database", "property": "object"}, "page_size": 100}
+    while True:
+        res = notion_client.post(token, "/search", payload)
+        notion_client.raise_for_error(res)
+        data = res.json()
+        for db in data.get("results", []):
+            parent = db.get("parent", {})
+            databases[db["id"]] = {
+                "title": _plain_title(db),
+                "parent_type": parent.get("type"),
+                "parent_id": _normalize_id(parent.get(parent.get("type")) if parent.get("type") != "workspace" else None),
+                "properties": {name: prop.get("type") for name, prop in db.get("properties", {}).items()},
+                "property_ids": {name: prop.get("id") for name, prop in db.get("properties", {}).items()},
+            }
+        if not data.get("has_more") or not data.get("next_cursor"):
+            break
+        payload = dict(payload, start_cursor=data["next_cursor"])
+
+    by_title = {}
+    for db_id, info in databases.items():
+        by_title.setdefault(info["title"], []).append(db_id)
+    return {"refreshed": _utcnow().isoformat(), "databases": databases, "by_title": by_title}
+
+def load_catalog(token, refresh=False):
+    """
+    디스크에 캐시된 카탈로그를 반환합니다. 없거나 TTL 이 지났거나 refresh=True 면 새로 만듭니다.
+    """
+    global _catalog, _fetched
+    with _lock:
+        if refresh or (os.environ.get("NOTION_CATALOG_REFRESH") == "1" and not _fetched):
+            _catalog = None
+        elif _catalog is None:
+            _catalog = local_cache.load_json(CATALOG_FILE)
+
+        if _catalog and not refresh:
+            age = _utcnow() - datetime.datetime.fromisoformat(_catalog["refreshed"])
+            if age < CATALOG_TTL:
+                return _catalog
+
+        print("Refreshing workspace catalog...")
+        _catalog = fetch_catalog(token)
+        _fetched = True
+        local_cache.save_json(CATALOG_FILE, _catalog)
+        print(f"Catalog has {len(_catalog['databases'])} databases.")
+        return _catalog
+
+def _page_of(token, catalog, db_id):
+    """
+    컬럼 등 블록 안에 있는 DB(부모가 block_id)가 들어 있는 페이지 ID.
+    부모 블록을 페이지까지 따라 올라가서 찾고, 카탈로그에 기억해 둡니다. 찾지 못하면 None.
+    """
+    info = catalog["databases"][db_id]
+    if "page_id" not in info:
+        parent_type, parent_id = info["parent_type"], info["parent_id"]
+        while parent_type == "block_id":
+            res = notion_client.get(token, f"/blocks/{parent_id}")
+            if res.status_code != 200:
+                break
+            parent = res.json().get("parent", {})
+            parent_type = parent.get("type")
+            parent_id = _normalize_id(parent.get(parent_type)) if parent_type in ("page_id", "block_id") else None
+        with _lock:
+            info["page_id"] = parent_id if parent_type == "page_id" else None
+            local_cache.save_json(CATALOG_FILE, catalog)
+    return info["page_id"]
+
+def _lookup(token, catalog, title, parent_id):
+    ids = catalog["by_title"].get(title)
+    if ids is None:
+        # "반려견 정보" -> "반려견 정보 (Pet Info)" 처럼 제목 일부로 찾는 경우
+        ids = [db_id for name, db_ids in catalog["by_title"].items() if title in name for db_id in db_ids]
+    if parent_id:
+        parent_id = _normalize_id(parent_id)
+        under_page = [i for i in ids if catalog["databases"][i]["parent_id"] == parent_id]
+        if under_page:
+            return under_page[0]
+        # 같은 제목의 다른 페이지 DB 를 고르지 않도록, 블록 안의 DB 는 페이지까지 올라가서 확인
+        nested = [i for i in ids if catalog["databases"][i]["parent_type"] == "block_id"]
+        return next((i for i in nested if _page_of(token, catalog, i) == parent_id), None)
+    return ids[0] if ids else None
+
+def find_database(token, title, parent_id=None, refresh=False):
+    """
+    제목(정확히 일치 우선, 없으면 부분 일치)으로 데이터베이스 ID 를 찾습니다.
+    캐시에서 못 찾으면 새로 만든 DB 일 수 있으니 한 번만 다시 가져옵니다.
+    """
+    catalog = load_catalog(token, refresh)
+    db_id = _lookup(token, catalog, title, parent_id)
+    if db_id is None and not _fetched:
+        catalog = load_catalog(token, refresh=True)
+        db_id = _lookup(token, catalog, title, parent_id)
+    return db_id
+
+def get_schema(token, db_id):
+    catalog = load_catalog(token)
+    info = catalog["databases"].get(db_id)
+    return info["properties"] if info else None
+
+def get_property_ids(token, db_id):
+    # filter_properties 에 쓸 속성 이름 -> 속성 ID (예전 캐시에는 없을 수 있음)
+    catalog = load_catalog(token)
+    info = catalog["databases"].get(db_id)
+    return info.get("property_ids") if info else None